@@ -22,6 +22,7 @@ PROJECT_TYPES = {
 # Configuración de análisis
 ANALYSIS_CONFIG = {
     'commit_limit': 1000,  # Límite de commits a analizar
+    'commit_days': 365,    # Antigüedad máxima (días) de los commits en el análisis rápido
     'branch_limit': 10,    # Límite de ramas a analizar
     'file_size_limit': 10 * 1024 * 1024  # 10MB límite para archivos
 } 
\ No newline at end of file
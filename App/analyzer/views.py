@@ -16,8 +16,7 @@ import logging
 import shutil
 import plotly.express as px
 import plotly.graph_objects as go
-import pandas as pd
-from github_getter import GitHubAnalyzer  # Asegúrate de tener la ruta correcta
+from github_getter import GitHubAnalyzer, git_timestamp_to_utc  # Asegúrate de tener la ruta correcta
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import inch, cm
@@ -25,6 +24,9 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
 from reportlab.lib.enums import TA_JUSTIFY, TA_LEFT
 from reportlab.lib.colors import Color
 import json
+from datetime import datetime, timedelta, timezone
+from itertools import chain, islice
+from collections import Counter, defaultdict
 from .constants import ANALYSIS_ERROR_MESSAGES, PROJECT_TYPES, ANALYSIS_CONFIG
 
 load_dotenv()
@@ -335,80 +337,84 @@ def quick_analysis(request):
             repo = analyzer.github.get_repo(analyzer._extract_repo_name(repo_url))
             
             # Obtención de commits y autores de todas las ramas
-            branches = repo.get_branches()
-            all_commits = []
-            commit_authors = []
-
-            # Análisis de commits por rama
-            for branch in branches:
-                branch_commits = repo.get_commits(sha=branch.name)
-                for commit in branch_commits:
-                    if commit.sha not in [c.sha for c in all_commits]:
-                        all_commits.append(commit)
-                        author = None
-                        if commit.author:
-                            author = commit.author.login
-                        elif commit.commit.author.email:
-                            author = commit.commit.author.email
+            branch_heads = analyzer._get_branch_heads(repo)
+            owner, name = repo.full_name.split("/")
+            # autor -> commits y autor -> Counter(fecha -> commits), acumulados en el mismo recorrido
+            author_totals = Counter()
+            daily_counts = defaultdict(Counter)
+
+            # Solo se piden los commits recientes para acotar la paginación
+            since = datetime.now(timezone.utc) - timedelta(days=ANALYSIS_CONFIG['commit_days'])
+            seen_shas = set()
+            seen_heads = set()
+
+            # Análisis de commits por rama: el historial llega como JSON plano de
+            # GraphQL, sin construir un objeto Commit de PyGithub por commit
+            for branch, head in branch_heads.items():
+                # Ramas que apuntan al mismo commit tienen el mismo historial
+                if head in seen_heads:
+                    continue
+                seen_heads.add(head)
+
+                branch_pages = analyzer._graphql_commit_pages(
+                    owner, name, branch, with_stats=False, since=since.isoformat()
+                )
+                branch_commits = chain.from_iterable(branch_pages)
+                for commit in islice(branch_commits, ANALYSIS_CONFIG['commit_limit']):
+                    if commit["oid"] not in seen_shas:
+                        seen_shas.add(commit["oid"])
+                        git_author = commit["author"] or {}
+                        if git_author.get("user"):
+                            author = git_author["user"]["login"]
+                        elif git_author.get("email"):
+                            author = git_author["email"]
                         else:
-                            author = commit.commit.author.name
-                        commit_authors.append(author)
+                            author = git_author.get("name")
+                        author_totals[author] += 1
+                        # authoredDate conserva el desfase horario del autor: el día se toma en UTC
+                        commit_day = git_timestamp_to_utc(commit["authoredDate"]).date().isoformat()
+                        daily_counts[author][commit_day] += 1
 
             # Verificación de commits encontrados
-            if not all_commits:
+            if not seen_shas:
                 messages.warning(request, 'No se encontraron commits en este repositorio')
                 return render(request, 'quick_analysis.html')
             
-            # Generación de visualizaciones
-            commit_data = pd.DataFrame({
-                'fecha': [c.commit.author.date.date() for c in all_commits],
-                'autor': commit_authors,
-                'hora': [c.commit.author.date.hour for c in all_commits],
-                'cantidad': 1
-            })
-
             # Gráfica de actividad
             fig_activity = go.Figure()
-            colors = px.colors.qualitative.Set1
 
-            for idx, autor in enumerate(commit_data['autor'].unique()):
-                df_autor = commit_data[commit_data['autor'] == autor]
-                df_daily = df_autor.groupby('fecha')['cantidad'].sum().reset_index()
+            for autor, commits_por_fecha in daily_counts.items():
+                fechas = sorted(commits_por_fecha)
                 
                 fig_activity.add_trace(
                     go.Scatter(
-                        x=df_daily['fecha'],
-                        y=df_daily['cantidad'],
+                        x=fechas,
+                        y=[commits_por_fecha[fecha] for fecha in fechas],
                         name=autor,
                         mode='lines+markers'
                     )
                 )
 
             # Gráfica de distribución de autores
-            df_authors = pd.DataFrame(commit_authors, columns=['autor'])
-            author_counts = df_authors['autor'].value_counts()
+            author_counts = author_totals.most_common()
             
             fig_authors = px.pie(
-                values=author_counts.values,
-                names=author_counts.index,
+                values=[count for _, count in author_counts],
+                names=[autor for autor, _ in author_counts],
                 title='Distribución de Commits por Desarrollador'
             )
 
-            # Análisis de lenguajes y estadísticas
-            repo_stats = analyzer.get_repo_stats(repo_url)
-            languages_data = []
-            libraries_data = []
-            
-            if repo_stats and "languages" in repo_stats:
-                languages_data = repo_stats['languages']
+            # Análisis de lenguajes y bibliotecas: sin recorrer de nuevo el historial
+            # completo ni reescribir los CSV del análisis detallado
+            repo_stats = analyzer.get_languages_and_libraries(repo, branch_heads.get(repo.default_branch))
 
             context = {
                 'graphs': {
                     'commits_activity': fig_activity.to_html(full_html=False),
                     'developer_distribution': fig_authors.to_html(full_html=False)
                 },
-                'languages': languages_data,
-                'libraries': repo_stats.get('libraries', [])
+                'languages': repo_stats['languages'],
+                'libraries': repo_stats['libraries']
             }
 
             return render(request, 'quick_analysis.html', context)
@@ -16,6 +16,9 @@ from github_getter import GitHubAnalyzer
 from briefing_analyzer import ComplianceAnalyzer
 from RAG_process import RepoRAGProcessor
 
+# Character budget for retrieved context, so the prompt stays within the model window
+MAX_CONTEXT_CHARS = 24000
+
 class LLMClient:
     def __init__(
         self, 
@@ -168,10 +171,14 @@ class GitHubRAGAnalyzer:
                 "¿Qué archivos de configuración de dependencias existen en el repositorio?"
             ]
 
-            context_parts = []
-            for query in analysis_queries:
-                retrieved_context = self.rag_processor.get_formatted_context(query, k=5)
-                context_parts.append(f"Consulta: {query}\n{retrieved_context}")
+            # Embed all queries in one call and skip chunks already retrieved by a previous query
+            retrieved_contexts = self.rag_processor.get_formatted_contexts(
+                analysis_queries, k=5, max_chars=MAX_CONTEXT_CHARS
+            )
+            context_parts = [
+                f"Consulta: {query}\n{retrieved_context}"
+                for query, retrieved_context in zip(analysis_queries, retrieved_contexts)
+            ]
             
             rag_context = "\n\n".join(context_parts)
             
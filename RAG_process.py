@@ -1,12 +1,38 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 import os
+import re
 import logging
 import json
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.document_loaders import TextLoader, DirectoryLoader, PyPDFLoader
+from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema.document import Document
+from briefing_analyzer import EmbeddingCache, _get_embeddings
+
+# Tuple so a single str.endswith call checks every suffix
+RELEVANT_EXTENSIONS = (
+    '.py', '.js', '.jsx', '.ts', '.tsx', '.java', '.html', '.css',
+    '.md', '.rst', '.txt', '.json', '.yml', '.yaml', '.ipynb'
+)
+
+# Directories pruned from the walk: dependencies, build output and VCS data
+IGNORED_DIRS = frozenset({
+    '.git', 'node_modules', '__pycache__', 'venv',
+    'dist', 'build', 'out', '.next', '.sass-cache'
+})
+# Generated lockfiles match the extensions above but are noise for the analysis
+IGNORED_FILES = frozenset({'package-lock.json', 'npm-shrinkwrap.json'})
+# Larger files are almost always generated, minified or data dumps
+MAX_FILE_SIZE = 256 * 1024
+# Bytes read from the start of a file to detect binary content
+BINARY_SNIFF_SIZE = 4096
+
+# Splitter separators are escaped once here and passed as regexes, so the
+# splitter does not re.escape every separator on each recursive split
+CODE_SEPARATORS = [re.escape(sep) for sep in ["\nclass ", "\ndef ", "\n\n", "\n", " ", ""]]
+DOC_SEPARATORS = [re.escape(sep) for sep in ["\n## ", "\n### ", "\n\n", "\n", ". ", " ", ""]]
 
 class RepoRAGProcessor:
     def __init__(self, embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
@@ -16,29 +42,29 @@ class RepoRAGProcessor:
         # Initialize embeddings
         self.logger.info(f"Loading embedding model: {embedding_model_name}")
         try:
-            model_kwargs = {'device': 'cpu'}
-            encode_kwargs = {'normalize_embeddings': True, 'batch_size': 32}
-            self.embeddings = HuggingFaceEmbeddings(
-                model_name=embedding_model_name,
-                model_kwargs=model_kwargs,
-                encode_kwargs=encode_kwargs
-            )
+            self.embeddings = _get_embeddings(embedding_model_name)
         except Exception as e:
             self.logger.error(f"Failed to load embedding model: {e}")
             raise
+        
+        # Chunk embeddings are cached by content hash, so re-processing a
+        # repository only embeds chunks that changed
+        self.embedding_cache = EmbeddingCache(model_name=embedding_model_name)
             
         # Configure text splitter for code and documentation
         self.code_splitter = RecursiveCharacterTextSplitter(
             chunk_size=3000,
             chunk_overlap=200,
-            separators=["\nclass ", "\ndef ", "\n\n", "\n", " ", ""]
+            separators=CODE_SEPARATORS,
+            is_separator_regex=True
         )
         
         # Configure text splitter for briefing documents
         self.doc_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=150,
-            separators=["\n## ", "\n### ", "\n\n", "\n", ". ", " ", ""]
+            separators=DOC_SEPARATORS,
+            is_separator_regex=True
         )
         
         self.vector_store = None
@@ -46,37 +72,29 @@ class RepoRAGProcessor:
     def _filter_relevant_files(self, repo_path: str) -> List[str]:
         """Filter out non-relevant files like binaries, images, etc."""
         self.logger.info(f"Starting to filter relevant files from {repo_path}")
-        relevant_extensions = [
-            '.py', '.js', '.jsx', '.ts', '.tsx', '.java', '.html', '.css',
-            '.md', '.rst', '.txt', '.json', '.yml', '.yaml', '.ipynb'
-        ]
         relevant_files = []
-
-        MAX_FILE_SIZE = 5 * 1024 * 1024
         
         file_count = 0
-        for root, _, files in os.walk(repo_path):
-            # Skip common directories to ignore
-            if any(ignore_dir in root for ignore_dir in [
-                '.git', 'node_modules', '__pycache__', 'venv', 
-                'dist', 'build', 'out', '.next', '.sass-cache'
-            ]):
-                continue
+        for root, dirs, files in os.walk(repo_path):
+            # Prune ignored directories so their subtrees are never walked
+            dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
                 
             for file in files:
                 file_count += 1
                 if file_count % 100 == 0:
                     self.logger.info(f"Scanned {file_count} files so far...")
                     
-                file_path = os.path.join(root, file)
-                _, ext = os.path.splitext(file)
-                
-                if ext.lower() in relevant_extensions:
+                if file.lower().endswith(RELEVANT_EXTENSIONS) and file not in IGNORED_FILES:
+                    file_path = os.path.join(root, file)
                     try:
                         file_size = os.path.getsize(file_path)
                         if file_size > MAX_FILE_SIZE:
-                            self.logger.info(f"Skipping large file {file_path} ({file_size/1024/1024:.1f}MB)")
+                            self.logger.info(f"Skipping large file {file_path} ({file_size/1024:.0f}KB)")
                             continue
+                        with open(file_path, 'rb') as f:
+                            if b"\x00" in f.read(BINARY_SNIFF_SIZE):
+                                self.logger.info(f"Skipping binary file {file_path}")
+                                continue
                         relevant_files.append(file_path)
                     except Exception:
                         continue
@@ -86,15 +104,19 @@ class RepoRAGProcessor:
     
     def _filter_files_by_extension(self, repo_path: str, extensions: List[str]) -> List[str]:
         """Filter files by extension"""
+        suffixes = tuple(extensions)
         result_files = []
         for root, _, files in os.walk(repo_path):
             for file in files:
-                file_path = os.path.join(root, file)
-                _, ext = os.path.splitext(file)
-                if ext.lower() in extensions:
-                    result_files.append(file_path)
+                if file.lower().endswith(suffixes):
+                    result_files.append(os.path.join(root, file))
         return result_files
 
+    def _read_file(self, file_path: str) -> str:
+        """Read a file as raw bytes and decode it once, dropping invalid UTF-8 sequences"""
+        with open(file_path, 'rb') as f:
+            return f.read().decode('utf-8', errors='ignore')
+
     def _detect_technologies(self, repo_path: str) -> Dict[str, List[str]]:
         """Detect technologies used in the repository by analyzing dependency files and imports"""
         technologies = {
@@ -169,14 +191,13 @@ class RepoRAGProcessor:
         
         for file_path in python_files:
             try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    for import_name, framework_name in framework_imports.items():
-                        if f"import {import_name}" in content or f"from {import_name}" in content:
-                            if framework_name in ['TensorFlow', 'PyTorch', 'scikit-learn']:
-                                technologies["frameworks"].append(framework_name)
-                            else:
-                                technologies["libraries"].append(framework_name)
+                content = self._read_file(file_path)
+                for import_name, framework_name in framework_imports.items():
+                    if f"import {import_name}" in content or f"from {import_name}" in content:
+                        if framework_name in ['TensorFlow', 'PyTorch', 'scikit-learn']:
+                            technologies["frameworks"].append(framework_name)
+                        else:
+                            technologies["libraries"].append(framework_name)
             except Exception:
                 continue
 
@@ -185,6 +206,45 @@ class RepoRAGProcessor:
                 
         return technologies
         
+    def _iter_file_chunks(self, repo_path: str, relevant_files: List[str]) -> Iterator[Document]:
+        """Read files in batches and yield their chunk documents as each batch is split"""
+        total_files = len(relevant_files)
+        
+        # Process files in smaller batches to avoid memory issues; files in a
+        # batch are read concurrently since file I/O releases the GIL
+        batch_size = 20
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for batch_idx in range(0, total_files, batch_size):
+                batch_end = min(batch_idx + batch_size, total_files)
+                self.logger.info(f"Processing file batch {batch_idx+1}-{batch_end} of {total_files}...")
+                
+                batch_files = relevant_files[batch_idx:batch_end]
+                futures = [executor.submit(self._read_file, file_path) for file_path in batch_files]
+                batch_texts = []
+                batch_metadatas = []
+                for file_path, future in zip(batch_files, futures):
+                    try:
+                        content = future.result()
+                        
+                        # Limit content size for very large files
+                        MAX_CONTENT_SIZE = 50000  # ~50KB limit
+                        if len(content) > MAX_CONTENT_SIZE:
+                            self.logger.info(f"Truncating large file: {os.path.basename(file_path)}")
+                            content = content[:MAX_CONTENT_SIZE] + "\n...[content truncated]..."
+                            
+                        relative_path = os.path.relpath(file_path, repo_path)
+                        batch_texts.append(content)
+                        batch_metadatas.append({"source": relative_path, "type": "code"})
+                    except Exception as e:
+                        self.logger.warning(f"Failed to process file {file_path}: {e}")
+                
+                # Create chunks for the whole batch in one splitter call
+                yield from self.code_splitter.create_documents(
+                    texts=batch_texts,
+                    metadatas=batch_metadatas
+                )
+        
     def process_repository(self, repo_path: str) -> bool:
         """Process repository files and create vectors with better error handling"""
         try:
@@ -225,43 +285,14 @@ class RepoRAGProcessor:
                 metadata={"source": "technology_analysis", "type": "metadata"}
             )
             
-            # Process each file with careful memory management
+            # Process each file with careful memory management: chunks are
+            # streamed into the vector store instead of being collected first
             self.logger.info("Step 3: Processing files into document chunks...")
-            documents = [tech_doc]
-            total_files = len(relevant_files)
-        
-            # Process files in smaller batches to avoid memory issues
-            batch_size = 20
-            for batch_idx in range(0, total_files, batch_size):
-                batch_end = min(batch_idx + batch_size, total_files)
-                self.logger.info(f"Processing file batch {batch_idx+1}-{batch_end} of {total_files}...")
-                
-                for idx in range(batch_idx, batch_end):
-                    file_path = relevant_files[idx]
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                            
-                            # Limit content size for very large files
-                            MAX_CONTENT_SIZE = 50000  # ~50KB limit
-                            if len(content) > MAX_CONTENT_SIZE:
-                                self.logger.info(f"Truncating large file: {os.path.basename(file_path)}")
-                                content = content[:MAX_CONTENT_SIZE] + "\n...[content truncated]..."
-                                
-                            relative_path = os.path.relpath(file_path, repo_path)
-                            
-                            # Create chunks
-                            file_docs = self.code_splitter.create_documents(
-                                texts=[content],
-                                metadatas=[{"source": relative_path, "type": "code"}]
-                            )
-                            documents.extend(file_docs)
-                    except Exception as e:
-                        self.logger.warning(f"Failed to process file {file_path}: {e}")
-            
-            self.logger.info(f"Successfully processed {len(documents)-1} files into {len(documents)} total chunks")
+            chunks = self._iter_file_chunks(repo_path, relevant_files)
+            batch_size = 50  # Smaller batches for vector creation
+            batch_docs = list(islice(chunks, batch_size))
             
-            if len(documents) <= 1:
+            if not batch_docs:
                 self.logger.error("No documents processed from repository")
                 return False
                 
@@ -270,24 +301,25 @@ class RepoRAGProcessor:
                 self.logger.info("Step 4: Creating vector store from documents...")
                 # Start with just the tech document to establish the vector store
                 self.vector_store = FAISS.from_documents(
-                    [documents[0]], 
+                    [tech_doc], 
                     self.embeddings,
                     distance_strategy='cosine'
                 )
                 
-                # Add remaining documents in small batches
-                remaining_docs = documents[1:]
-                batch_size = 50  # Smaller batches for vector creation
-                total_batches = (len(remaining_docs) + batch_size - 1) // batch_size
-                
-                for i in range(0, len(remaining_docs), batch_size):
-                    batch_end = min(i + batch_size, len(remaining_docs))
-                    current_batch = i // batch_size + 1
-                    self.logger.info(f"Adding vector batch {current_batch}/{total_batches} ({i+1}-{batch_end} of {len(remaining_docs)})")
-                    batch_docs = remaining_docs[i:batch_end]
-                    self.vector_store.add_documents(batch_docs)
+                # Add chunks in small batches as they are produced
+                chunk_count = 0
+                while batch_docs:
+                    chunk_count += len(batch_docs)
+                    self.logger.info(f"Adding vector batch of {len(batch_docs)} chunks ({chunk_count} so far)")
+                    texts = [doc.page_content for doc in batch_docs]
+                    vectors = self.embedding_cache.embed_documents(texts, self.embeddings)
+                    self.vector_store.add_embeddings(
+                        text_embeddings=list(zip(texts, vectors.tolist())),
+                        metadatas=[doc.metadata for doc in batch_docs]
+                    )
+                    batch_docs = list(islice(chunks, batch_size))
                 
-                self.logger.info(f"Repository processing complete with {len(documents)} chunks")
+                self.logger.info(f"Repository processing complete with {chunk_count + 1} chunks")
                 return True
                 
             except Exception as vector_error:
@@ -296,7 +328,7 @@ class RepoRAGProcessor:
                 try:
                     self.logger.info("Attempting recovery with minimal document set...")
                     self.vector_store = FAISS.from_documents(
-                        [documents[0]], 
+                        [tech_doc], 
                         self.embeddings,
                         distance_strategy='cosine'
                     )
@@ -359,9 +391,8 @@ class RepoRAGProcessor:
             self.logger.error(f"Failed to retrieve content: {e}")
             return []
 
-    def get_formatted_context(self, query: str, k: int = 8) -> str:
-        """Get formatted context string from relevant documents"""
-        docs = self.retrieve_relevant_content(query, k)
+    def _format_docs(self, docs: List[Document]) -> str:
+        """Format documents as a context string labelled by their origin"""
         context_parts = []
         
         for doc in docs:
@@ -373,4 +404,60 @@ class RepoRAGProcessor:
             else:
                 context_parts.append(f"--- FROM BRIEFING ---\n{doc.page_content}\n")
                 
-        return "\n".join(context_parts)
\ No newline at end of file
+        return "\n".join(context_parts)
+
+    def get_formatted_context(self, query: str, k: int = 8) -> str:
+        """Get formatted context string from relevant documents"""
+        return self._format_docs(self.retrieve_relevant_content(query, k))
+
+    def get_formatted_contexts(self, queries: List[str], k: int = 8, max_chars: Optional[int] = None) -> List[str]:
+        """
+        Get one formatted context per query, embedding all queries in a single
+        batched call. A chunk retrieved by several queries is only included the
+        first time, so shared context is not repeated in the prompt. With
+        max_chars, the closest chunks across all queries are kept until the
+        character budget is used up.
+        """
+        if not self.vector_store:
+            self.logger.error("Vector store not initialized")
+            return ["" for _ in queries]
+            
+        try:
+            query_vectors = self.embeddings.embed_documents(queries)
+        except Exception as e:
+            self.logger.error(f"Failed to embed queries: {e}")
+            return ["" for _ in queries]
+        
+        # (distance, query index, rank, document) for every unique hit
+        seen_chunks = set()
+        hits = []
+        for query_idx, query_vector in enumerate(query_vectors):
+            try:
+                results = self.vector_store.similarity_search_with_score_by_vector(query_vector, k=k)
+            except Exception as e:
+                self.logger.error(f"Failed to retrieve content: {e}")
+                results = []
+            
+            for rank, (doc, distance) in enumerate(results):
+                key = (doc.metadata.get("source"), doc.page_content)
+                if key not in seen_chunks:
+                    seen_chunks.add(key)
+                    hits.append((distance, query_idx, rank, doc))
+        
+        if max_chars is not None:
+            # The index uses L2 distance on normalized vectors: lower is closer
+            selected = []
+            used_chars = 0
+            for hit in sorted(hits, key=lambda hit: hit[0]):
+                size = len(hit[3].page_content)
+                if used_chars + size <= max_chars:
+                    selected.append(hit)
+                    used_chars += size
+            self.logger.info(f"Selected {len(selected)} of {len(hits)} chunks within {max_chars} characters")
+            hits = selected
+        
+        docs_by_query = [[] for _ in queries]
+        for _, query_idx, _, doc in sorted(hits, key=lambda hit: (hit[1], hit[2])):
+            docs_by_query[query_idx].append(doc)
+            
+        return [self._format_docs(docs) for docs in docs_by_query]
@@ -1,18 +1,135 @@
 import fitz
+import os
+import hashlib
 import logging
+import sqlite3
+import numpy as np
+from functools import lru_cache
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
-from sklearn.metrics.pairwise import cosine_similarity
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'reposcope', 'embeddings.sqlite')
+# Components of unit-length embeddings lie in [-1, 1] and map onto int8 as x * 127
+INT8_SCALE = 127
+
+def select_embedding_device():
+    """Return 'cuda' when a GPU is available for the embedding model, else 'cpu'"""
+    try:
+        import torch
+    except ImportError:
+        return 'cpu'
+    return 'cuda' if torch.cuda.is_available() else 'cpu'
+
+@lru_cache(maxsize=4)
+def _get_embeddings(model_name):
+    """Load an embedding model once per process and share it between analyzers"""
+    # Normalized embeddings turn cosine similarity into a plain dot product
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={'device': select_embedding_device()},
+        encode_kwargs={'normalize_embeddings': True, 'batch_size': 64}
+    )
+
+def _quantize(vectors):
+    """Quantize normalized embeddings to int8 codes"""
+    return np.round(np.asarray(vectors, dtype=np.float32) * INT8_SCALE).astype(np.int8)
+
+def _dequantize(codes):
+    """Map int8 codes back to float32 vectors for the similarity product"""
+    return np.asarray(codes, dtype=np.float32) / INT8_SCALE
+
+class EmbeddingCache:
+    """
+    On-disk (SQLite) cache of document embeddings keyed by model name and
+    the SHA-256 of the document text, so unchanged documents are not re-embedded.
+    Vectors are stored as int8 codes, a quarter of the float32 size.
+    """
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH, model_name=EMBEDDING_MODEL_NAME):
+        self.path = path
+        self.model_name = model_name
+        self._initialized = False
+
+    def _connect(self):
+        """Open the database, creating the file and table on first use"""
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with sqlite3.connect(self.path) as conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS embeddings_int8 (key TEXT PRIMARY KEY, codes BLOB)")
+            self._initialized = True
+        return sqlite3.connect(self.path)
+
+    def _key(self, text):
+        return f"{self.model_name}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def get_many(self, texts):
+        """Return the cached int8 codes for each text, or None where there is no entry."""
+        keys = [self._key(text) for text in texts]
+        found = {}
+        with self._connect() as conn:
+            # Stay below SQLite's limit on bound parameters per statement
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(conn.execute(
+                    f"SELECT key, codes FROM embeddings_int8 WHERE key IN ({placeholders})", chunk
+                ))
+        return [np.frombuffer(found[key], dtype=np.int8) if key in found else None for key in keys]
+
+    def set_many(self, texts, codes):
+        """Store the int8 codes computed for the given texts."""
+        rows = [
+            (self._key(text), np.asarray(code, dtype=np.int8).tobytes())
+            for text, code in zip(texts, codes)
+        ]
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO embeddings_int8 (key, codes) VALUES (?, ?)", rows)
+
+    def embed_documents(self, texts, embeddings):
+        """
+        Embed texts through the cache, sending only uncached texts to the model
+        in a single batched call.
+        
+        Args:
+            texts (list): Document texts to embed
+            embeddings: Embedding model with an embed_documents method
+            
+        Returns:
+            numpy.ndarray: float32 matrix with one row per text
+        """
+        codes = self.get_many(texts)
+        missing = [idx for idx, code in enumerate(codes) if code is None]
+        if missing:
+            missing_texts = [texts[idx] for idx in missing]
+            new_codes = _quantize(embeddings.embed_documents(missing_texts))
+            self.set_many(missing_texts, new_codes)
+            for idx, code in zip(missing, new_codes):
+                codes[idx] = code
+        logging.getLogger(__name__).info(f"Reused {len(texts) - len(missing)} cached embeddings")
+        # Fresh and cached texts go through the same int8 codes so results
+        # do not depend on whether the cache was warm
+        return _dequantize(np.vstack(codes))
 
 class ComplianceAnalyzer:
     def __init__(self):
         """Initialize ComplianceAnalyzer with logging configuration"""
         self.logger = logging.getLogger(__name__)
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
-        )
+        self._embeddings = None
+        self.embedding_cache = EmbeddingCache()
         self.threshold = 0.7  # Minimum similarity for compliance
 
+    @property
+    def embeddings(self):
+        """Shared embedding model, loaded on first use"""
+        if getattr(self, '_embeddings', None) is None:
+            self._embeddings = _get_embeddings(EMBEDDING_MODEL_NAME)
+        return self._embeddings
+
+    @embeddings.setter
+    def embeddings(self, value):
+        self._embeddings = value
+
     def extract_text_from_pdf(self, pdf_path):
         """
         Extracts text from a given PDF file.
@@ -26,7 +143,11 @@ class ComplianceAnalyzer:
         text = ""
         try:
             doc = fitz.open(pdf_path)
-            text = " ".join([page.get_text() for page in doc])
+            try:
+                # get_text() already defaults to plain text without block sorting
+                text = " ".join(page.get_text() for page in doc)
+            finally:
+                doc.close()
             self.logger.info(f"Successfully extracted text from {pdf_path}")
         except Exception as e:
             self.logger.error(f"Error extracting text from PDF: {e}")
@@ -45,13 +166,15 @@ class ComplianceAnalyzer:
         """
         try:
             # Convert briefing text to embeddings
-            briefing_embedding = self.embeddings.embed_query(briefing_text)
+            briefing_embedding = np.asarray(self.embeddings.embed_query(briefing_text), dtype=np.float32)
 
-            # Convert repository text to embeddings
-            repo_embeddings = [self.embeddings.embed_query(doc) for doc in repo_docs]
+            # Convert repository text to embeddings, embedding only documents
+            # missing from the cache in a single batched call
+            repo_embeddings = self.embedding_cache.embed_documents(repo_docs, self.embeddings)
 
-            # Compute similarity scores
-            similarities = cosine_similarity([briefing_embedding], repo_embeddings)[0]
+            # Compute similarity scores with a single float32 matrix-vector
+            # product (vectors are already unit length)
+            similarities = repo_embeddings @ briefing_embedding
 
             compliance_results = []
 
@@ -1,11 +1,31 @@
-from github import Github
+from github import Github, GithubException, GithubRetry, RateLimitExceededException
 import os
+import io
+import sys
+import re
+import csv
+import shutil
+import subprocess
+import queue
+import sqlite3
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 from dotenv import load_dotenv
-import pandas as pd
 import json
-import matplotlib.pyplot as plt
-import seaborn as sns
+try:
+    # orjson es opcional: parsea bytes directamente y es más rápido que json
+    import orjson
+except ImportError:
+    orjson = None
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from xml.etree import ElementTree
 
 # Crear directorio de logs si no existe
 os.makedirs('logs', exist_ok=True)
@@ -33,6 +53,185 @@ console_handler.setFormatter(log_format)
 logger.addHandler(file_handler)
 logger.addHandler(console_handler)
 
+# Número máximo de peticiones simultáneas a la API de GitHub
+MAX_WORKERS = 16
+
+# Conexiones HTTP reutilizables por host y elementos por página en la API REST
+POOL_SIZE = 32
+PER_PAGE = 100
+
+# Número máximo de lecturas de archivo simultáneas
+IO_WORKERS = 32
+
+# Páginas del historial de una rama descargadas por adelantado antes de procesarlas
+PREFETCH_PAGES = 2
+
+# Tiempo máximo (segundos) para clonar un repositorio
+CLONE_TIMEOUT = 300
+
+# Extensiones de archivo cuyo texto se extrae del repositorio
+SUPPORTED_EXTENSIONS = frozenset({".py", ".md", ".txt", ".js", ".html", ".css"})
+
+# Nombre 'propietario/repo' dentro de una URL de GitHub (https o ssh), ignorando
+# sufijo .git, rutas /tree/ o /blob/, query y barra final
+REPO_URL_RE = re.compile(r"github\.com[:/]([^/]+/[^/#?]+?)(?:\.git)?(?:[/#?]|$)")
+
+# Mensajes de commit generados por merges
+MERGE_MESSAGE_RE = re.compile(r"merge (?:pull request|branch|remote)", re.IGNORECASE)
+
+# Espacio de nombres de Maven usado en pom.xml
+MAVEN_NS = '{http://maven.apache.org/POM/4.0.0}'
+MAVEN_DEPENDENCY_TAG = f'{MAVEN_NS}dependency'
+
+# Columnas de los CSV generados por get_repo_stats
+BRANCH_AUTHOR_FIELDS = ['Branch', 'Author', 'Commits', 'Additions', 'Deletions']
+DETAILED_COMMIT_FIELDS = ['Branch', 'Author', 'CommitSHA', 'Message', 'Additions', 'Deletions', 'Date']
+
+# Caché persistente de respuestas de la API REST (ETag + cuerpo)
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'reposcope')
+API_CACHE_PATH = os.path.join(CACHE_DIR, 'github_api.sqlite')
+
+# La API GraphQL de GitHub no admite peticiones anónimas
+MISSING_TOKEN_ERROR = (
+    "Falta el token de GitHub: define GITHUB_API_KEY (o GITHUB_TOKEN) en el entorno; "
+    "la API GraphQL de GitHub no admite peticiones sin autenticar"
+)
+
+# Consulta GraphQL que devuelve el historial de una rama con las estadísticas
+# de cada commit, evitando una petición REST por commit
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+COMMIT_HISTORY_QUERY = """
+query($owner: String!, $name: String!, $branch: String!, $cursor: String, $withStats: Boolean!, $since: GitTimestamp) {
+  repository(owner: $owner, name: $name) {
+    ref(qualifiedName: $branch) {
+      target {
+        ... on Commit {
+          history(first: 100, after: $cursor, since: $since) {
+            pageInfo { hasNextPage endCursor }
+            nodes {
+              oid
+              message
+              additions @include(if: $withStats)
+              deletions @include(if: $withStats)
+              authoredDate
+              author { name email user { login } }
+              parents { totalCount }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+def git_timestamp_to_utc(timestamp):
+    """
+    Convierte un GitTimestamp de GraphQL a datetime en UTC.
+    GitHub conserva el desfase horario del autor (p. ej. +02:00), no lo normaliza a UTC.
+
+    Args:
+        timestamp (str): Fecha ISO 8601 con desfase o sufijo Z
+
+    Returns:
+        datetime: Fecha con zona horaria UTC
+    """
+    # fromisoformat no admite el sufijo Z antes de Python 3.11
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).astimezone(timezone.utc)
+
+def _json_loads(data):
+    """Deserializa JSON desde str o bytes, con orjson si está disponible."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _json_dumps(data):
+    """Serializa a JSON en bytes UTF-8, con orjson si está disponible."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode("utf-8")
+
+def _build_retry():
+    """Política de reintentos de la sesión GraphQL ante errores transitorios del servidor de GitHub."""
+    return Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=frozenset({"GET", "POST"})
+    )
+
+@lru_cache(maxsize=None)
+def _get_github_client(token):
+    """
+    Devuelve el cliente de PyGithub asociado al token, compartido entre instancias
+    para reutilizar su pool de conexiones. GithubRetry conserva la espera ante
+    límites secundarios de la API que un Retry genérico de urllib3 no gestiona.
+    """
+    return Github(token, per_page=PER_PAGE, pool_size=POOL_SIZE, retry=GithubRetry(total=5, backoff_factor=0.5))
+
+@lru_cache(maxsize=None)
+def _get_plotting_modules():
+    """
+    Importa pyplot y seaborn en el primer uso: solo quien genera gráficas paga
+    su coste de carga. El backend sin interfaz gráfica (Agg) se elige una única
+    vez y solo si pyplot no estaba ya importado, para no cambiárselo a otros módulos.
+    """
+    import matplotlib
+    if 'matplotlib.pyplot' not in sys.modules:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
+@lru_cache(maxsize=None)
+def _get_http_session(token):
+    """
+    Devuelve una sesión HTTP con pool de conexiones para la API GraphQL,
+    compartida entre instancias para evitar un handshake TLS por petición.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=_build_retry())
+    session.mount("https://", adapter)
+    if token:
+        session.headers["Authorization"] = f"bearer {token}"
+    return session
+
+class ETagCache:
+    """
+    Caché en disco (SQLite) de respuestas de la API de GitHub indexadas por URL.
+    Guarda el ETag de cada respuesta para poder repetir la petición con
+    If-None-Match: un 304 no consume límite de la API.
+    """
+
+    def __init__(self, path=API_CACHE_PATH):
+        self.path = path
+        self._initialized = False
+
+    def _connect(self):
+        """Abre la base de datos; el archivo y la tabla se crean en el primer uso."""
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with sqlite3.connect(self.path) as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, etag TEXT, body TEXT)"
+                )
+            self._initialized = True
+        return sqlite3.connect(self.path)
+
+    def get(self, url):
+        """Devuelve (etag, cuerpo) para la URL, o (None, None) si no está en caché."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT etag, body FROM responses WHERE url = ?", (url,)).fetchone()
+        return row if row else (None, None)
+
+    def set(self, url, etag, body):
+        """Guarda o reemplaza la respuesta asociada a la URL."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (url, etag, body) VALUES (?, ?, ?)",
+                (url, etag, body)
+            )
+
 class GitHubAnalyzer:
     """
     Clase principal para analizar repositorios de GitHub.
@@ -47,12 +246,17 @@ class GitHubAnalyzer:
         almacenado en las variables de entorno.
         """
         load_dotenv()
-        self.token = os.getenv('GITHUB_TOKEN')
-        self.github = Github(self.token)
+        # GITHUB_API_KEY es el nombre documentado en el README; se acepta también GITHUB_TOKEN
+        self.token = os.getenv('GITHUB_API_KEY') or os.getenv('GITHUB_TOKEN')
+        self.github = _get_github_client(self.token)
+        self.session = _get_http_session(self.token)
+        self.cache = ETagCache()
         self.logger = logger
         self.logger.info("GitHub Analyzer inicializado")
 
-    def _extract_repo_name(self, repo_url):
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _extract_repo_name(repo_url):
         """
         Extrae el nombre del repositorio desde la URL de GitHub.
         
@@ -62,18 +266,211 @@ class GitHubAnalyzer:
         Returns:
             str: Nombre del repositorio en formato 'propietario/repo'
         """
+        match = REPO_URL_RE.search(repo_url)
+        if match:
+            return match.group(1)
+
         repo_name = repo_url.split("github.com/")[-1].strip("/")
         if "tree" in repo_name:
             repo_name = repo_name.split("/tree/")[0]
         return repo_name
 
-    def get_repo_stats(self, repo_url):
+    def _cached_get(self, url):
+        """
+        Realiza un GET a la API REST usando la caché de ETags. Si GitHub responde
+        304 (sin cambios) se devuelve el cuerpo almacenado.
+
+        Args:
+            url (str): URL del endpoint de la API
+
+        Returns:
+            Respuesta JSON deserializada
+        """
+        etag, cached_body = self.cache.get(url)
+        headers = {"If-None-Match": etag} if etag else None
+
+        status, response_headers, body = self.github.requester.requestJson("GET", url, headers=headers)
+        if status == 304 and cached_body is not None:
+            self.logger.debug(f"Cache hit (304) for {url}")
+            return _json_loads(cached_body)
+        if status >= 400:
+            raise GithubException(status, body, response_headers)
+
+        self.cache.set(url, response_headers.get("etag"), body)
+        return _json_loads(body)
+
+    def _get_branch_heads(self, repo):
+        """
+        Obtiene todas las ramas del repositorio con el SHA de su último commit,
+        página a página, a través de la caché de ETags.
+
+        Args:
+            repo: Objeto de repositorio de GitHub
+
+        Returns:
+            dict: Nombre de rama -> SHA del commit HEAD, en el orden de la API
+        """
+        branch_heads = {}
+        page = 1
+        while True:
+            branches = self._cached_get(f"{repo.url}/branches?per_page=100&page={page}")
+            branch_heads.update((branch["name"], branch["commit"]["sha"]) for branch in branches)
+            if len(branches) < 100:
+                return branch_heads
+            page += 1
+
+    @staticmethod
+    def _snapshot_path(owner, name, head_sha):
+        """
+        Ruta del fichero de caché de lenguajes y bibliotecas asociado al commit
+        HEAD de la rama por defecto.
+
+        Args:
+            owner (str): Propietario del repositorio
+            name (str): Nombre del repositorio
+            head_sha (str): SHA del HEAD de la rama por defecto
+
+        Returns:
+            str: Ruta del fichero, o None si no se conoce el SHA
+        """
+        if not head_sha:
+            return None
+        return os.path.join(CACHE_DIR, f"{owner}__{name}__{head_sha}.json")
+
+    def _load_snapshot(self, path):
+        """Lee un resultado cacheado en disco; devuelve None si no existe o no es válido."""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            return _json_loads(Path(path).read_bytes())
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable cache file {path}: {str(e)}")
+            return None
+
+    def _save_snapshot(self, path, data):
+        """Guarda un resultado en la caché en disco, sin interrumpir el análisis si falla."""
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            Path(path).write_bytes(_json_dumps(data))
+        except Exception as e:
+            self.logger.warning(f"Could not write cache file {path}: {str(e)}")
+
+    def _graphql_commit_pages(self, owner, name, branch, with_stats=True, since=None):
+        """
+        Recorre el historial completo de una rama mediante la API GraphQL,
+        paginando de 100 en 100 commits.
+
+        Args:
+            owner (str): Propietario del repositorio
+            name (str): Nombre del repositorio
+            branch (str): Nombre de la rama
+            with_stats (bool): Si se piden las líneas añadidas y eliminadas de cada commit
+            since (str): Fecha ISO 8601 opcional; solo se devuelven commits posteriores
+
+        Yields:
+            list: Página de nodos de commit con oid, mensaje, estadísticas, autor y padres
+
+        Raises:
+            ValueError: Si no hay token de GitHub configurado
+        """
+        if not self.token:
+            raise ValueError(MISSING_TOKEN_ERROR)
+
+        cursor = None
+
+        while True:
+            response = self.session.post(
+                GITHUB_GRAPHQL_URL,
+                json={
+                    "query": COMMIT_HISTORY_QUERY,
+                    "variables": {
+                        "owner": owner, "name": name, "branch": branch,
+                        "cursor": cursor, "withStats": with_stats, "since": since
+                    }
+                },
+                timeout=30
+            )
+            response.raise_for_status()
+            payload = response.json()
+            if payload.get("errors"):
+                raise ValueError(f"GraphQL error: {payload['errors']}")
+
+            ref = payload["data"]["repository"]["ref"]
+            if not ref:
+                return
+
+            history = ref["target"]["history"]
+            yield history["nodes"]
+            if not history["pageInfo"]["hasNextPage"]:
+                return
+            cursor = history["pageInfo"]["endCursor"]
+
+    def _prefetch_commits(self, executor, stop, owner, name, branch, with_stats=True):
+        """
+        Lanza en segundo plano la descarga del historial de una rama y devuelve
+        un iterador que entrega los commits a medida que llegan las páginas, de
+        modo que el procesado se solapa con las peticiones pendientes. Solo se
+        adelantan PREFETCH_PAGES páginas, para no acumular el historial en memoria.
+
+        Args:
+            executor (ThreadPoolExecutor): Pool donde se ejecuta la descarga
+            stop (threading.Event): Señal para abandonar la descarga cuando el
+                consumidor deja de leer
+            owner (str): Propietario del repositorio
+            name (str): Nombre del repositorio
+            branch (str): Nombre de la rama
+            with_stats (bool): Si se piden las líneas añadidas y eliminadas de cada commit
+
+        Returns:
+            iterator: Nodos de commit de la rama en orden
+        """
+        pages = queue.Queue(maxsize=PREFETCH_PAGES)
+
+        def put(item):
+            # Espera hueco en la cola salvo que el consumidor haya dejado de leer
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def produce():
+            try:
+                for page in self._graphql_commit_pages(owner, name, branch, with_stats):
+                    if not put(page):
+                        return
+                put(None)
+            except Exception as e:
+                put(e)
+
+        executor.submit(produce)
+
+        def consume():
+            while True:
+                page = pages.get()
+                if page is None:
+                    return
+                if isinstance(page, Exception):
+                    raise page
+                yield from page
+
+        return consume()
+
+    def get_repo_stats(self, repo_url, collect_diff_stats=True):
         """
         Obtiene estadísticas completas del repositorio incluyendo ramas, commits,
         contribuidores y lenguajes de programación.
         
         Args:
             repo_url (str): URL del repositorio de GitHub
+            collect_diff_stats (bool): Si se calculan las líneas añadidas y eliminadas
+                por commit; desactivarlo aligera las consultas cuando no se necesitan.
+                En ese caso las columnas Additions/Deletions de los CSV quedan vacías
+                y los totales de líneas se devuelven como None
             
         Returns:
             dict: Estadísticas del repositorio con información detallada
@@ -81,173 +478,178 @@ class GitHubAnalyzer:
         try:
             # Inicio del análisis y verificación de límites de la API
             self.logger.info(f"Starting repository analysis for: {repo_url}")
-            rate_limit = self.github.get_rate_limit()
-            self.logger.info(f"API Rate Limit remaining: {rate_limit.core.remaining}")
 
-            if rate_limit.core.remaining < 1:
+            # Sin token el historial (GraphQL) no es accesible: error de configuración explícito
+            if not self.token:
+                self.logger.error(MISSING_TOKEN_ERROR)
+                return {
+                    "error": MISSING_TOKEN_ERROR,
+                    "branches": [],
+                    "commit_count": 0,
+                    "contributors": {},
+                    "languages": [],
+                    "libraries": [],
+                    "total_additions": 0,
+                    "total_deletions": 0
+                }
+
+            # Obtener objeto del repositorio y sus ramas
+            full_name = self._extract_repo_name(repo_url)
+            try:
+                repo = self.github.get_repo(full_name)
+            except RateLimitExceededException:
                 self.logger.error("GitHub API rate limit exceeded")
                 return {"error": "API rate limit exceeded"}
-            
-            # Obtener objeto del repositorio y sus ramas
-            repo = self.github.get_repo(self._extract_repo_name(repo_url))
-            branches = list(repo.get_branches())
+
+            # El límite restante llega en las cabeceras de la respuesta anterior,
+            # sin necesidad de una petición extra a /rate_limit
+            remaining, _ = self.github.rate_limiting
+            self.logger.info(f"API Rate Limit remaining: {remaining}")
+
+            if remaining < 1:
+                self.logger.error("GitHub API rate limit exceeded")
+                return {"error": "API rate limit exceeded"}
+
+            branch_heads = self._get_branch_heads(repo)
+            branches = list(branch_heads)
+
+            # Ramas que apuntan al mismo commit comparten todo el historial:
+            # solo se recorre la primera de ellas
+            seen_heads = set()
+            branches_to_walk = []
+            for branch, head in branch_heads.items():
+                if head not in seen_heads:
+                    seen_heads.add(head)
+                    branches_to_walk.append(branch)
 
             # Inicialización de contadores y estructuras de datos
             commit_count = 0
-            contributors_data = {}
-            commits_by_branch_author = []
-            detailed_commit_data = []
+            contributors_data = defaultdict(int)
+            # (rama, autor) -> [commits, additions, deletions]
+            branch_author_totals = defaultdict(lambda: [0, 0, 0])
             total_additions = 0
             total_deletions = 0
 
             processed_commits = set()
+            owner, name = repo.full_name.split("/")
 
-            # Análisis de commits por rama
-            for branch in branches:
-                commits = repo.get_commits(sha=branch.name)
-                branch_commits = list(commits)
-                branch_unique_commits = 0
-
-                for commit in branch_commits:
-                    if commit.sha in processed_commits:
-                        continue
-
-                    # Ignorar commits de merge
-                    is_merge_commit = False
-                    if len(commit.parents) > 1:
-                        is_merge_commit = True
-
-                    elif any(pattern in commit.commit.message.lower() for pattern in [
-                        "merge pull request", "merge branch", "merge remote"
-                    ]):
-                        is_merge_commit = True
-
-                    if is_merge_commit:
-                        self.logger.debug(f"Skipping merge commit: {commit.sha[:7]} in branch {branch.name}")
-                        processed_commits.add(commit.sha)  # Mark as processed so we don't reprocess
-                        continue
-
-                    processed_commits.add(commit.sha)
-                    commit_count += 1
-                    branch_unique_commits += 1
-
-                    author = commit.author.login if commit.author else "Unknown"
-                    contributors_data[author] = contributors_data.get(author, 0) + 1
-
-                    additions = commit.stats.additions
-                    deletions = commit.stats.deletions
-                    total_additions += additions
-                    total_deletions += deletions
-
-                    # Commit message
-                    message = commit.commit.message
-                    # Eliminar saltos de línea y retornos para evitar problemas en CSV
-                    message = message.replace("\n", " ").replace('\r', '')
+            output_dir = 'github_stats'
+            os.makedirs(output_dir, exist_ok=True)
+            detailed_csv_path = os.path.join(output_dir, 'detailed_commits.csv')
+
+            # Los datos detallados de cada commit se escriben en el CSV a medida que se procesan
+            stop_prefetch = threading.Event()
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor, \
+                 open(detailed_csv_path, 'w', newline='', encoding='utf-8') as detailed_file:
+                try:
+                    # Descarga concurrente del historial de cada rama vía GraphQL
+                    commits_by_branch = [
+                        self._prefetch_commits(executor, stop_prefetch, owner, name, branch, collect_diff_stats)
+                        for branch in branches_to_walk
+                    ]
 
-                    commit_date = commit.commit.author.date.strftime("%Y-%m-%d %H:%M:%S")
-                    
-                    # Recolección de datos para CSV
-                    commits_by_branch_author.append({
-                        'Branch': branch.name,
-                        'Author': author,
-                        'Commits': 1,
-                        'Additions': additions,
-                        'Deletions': deletions,
-                        'CommitSHA': commit.sha
-                    })
-
-                    # Datos detallados de cada commit
-                    detailed_commit_data.append({
-                        'Branch': branch.name,
-                        'Author': author,
-                        'CommitSHA': commit.sha,
-                        'Message': message,
-                        'Additions': additions,
-                        'Deletions': deletions,
-                        'Date': commit_date
-                    })
-
-            # Crear DataFrame y agrupar por rama y autor
-            df_commits = pd.DataFrame(commits_by_branch_author)
-            grouped_commits = df_commits.groupby(['Branch', 'Author']).agg({
-                'Commits': 'sum',
-                'Additions': 'sum',
-                'Deletions': 'sum'
-            }).reset_index()
-            grouped_commits_list = grouped_commits.to_dict('records')
+                    # Filas como tuplas en el orden de DETAILED_COMMIT_FIELDS: evita crear un dict por commit
+                    detailed_writer = csv.writer(detailed_file)
+                    detailed_writer.writerow(DETAILED_COMMIT_FIELDS)
+
+                    # Análisis de commits por rama
+                    for branch, branch_commits in zip(branches_to_walk, commits_by_branch):
+                        for commit in branch_commits:
+                            sha = commit["oid"]
+                            if sha in processed_commits:
+                                continue
+
+                            # Ignorar commits de merge
+                            is_merge_commit = False
+                            if commit["parents"]["totalCount"] > 1:
+                                is_merge_commit = True
+
+                            elif MERGE_MESSAGE_RE.search(commit["message"]):
+                                is_merge_commit = True
+
+                            if is_merge_commit:
+                                self.logger.debug(f"Skipping merge commit: {sha[:7]} in branch {branch}")
+                                processed_commits.add(sha)  # Mark as processed so we don't reprocess
+                                continue
+
+                            processed_commits.add(sha)
+                            commit_count += 1
+
+                            user = (commit["author"] or {}).get("user")
+                            author = user["login"] if user else "Unknown"
+                            contributors_data[author] += 1
+
+                            # Sin estadísticas de diff las líneas quedan vacías en el CSV,
+                            # no a 0, para no confundirlas con commits sin cambios
+                            if collect_diff_stats:
+                                additions = commit.get("additions", 0)
+                                deletions = commit.get("deletions", 0)
+                                total_additions += additions
+                                total_deletions += deletions
+                            else:
+                                additions = deletions = None
+
+                            # Commit message
+                            message = commit["message"]
+                            # Eliminar saltos de línea y retornos para evitar problemas en CSV
+                            message = message.replace("\n", " ").replace('\r', '')
+
+                            # authoredDate conserva el desfase horario del autor: se normaliza a UTC
+                            commit_date = git_timestamp_to_utc(commit["authoredDate"]).strftime("%Y-%m-%d %H:%M:%S")
+
+                            # Agregación por rama y autor
+                            totals = branch_author_totals[(branch, author)]
+                            totals[0] += 1
+                            if collect_diff_stats:
+                                totals[1] += additions
+                                totals[2] += deletions
+
+                            # Datos detallados de cada commit
+                            detailed_writer.writerow(
+                                (branch, author, sha, message, additions, deletions, commit_date)
+                            )
+                finally:
+                    # Si el procesado falla, las descargas pendientes se abandonan en lugar
+                    # de que el cierre del pool espere a que terminen
+                    stop_prefetch.set()
+
+            self.logger.info(f"Detailed commit information saved to {detailed_csv_path}")
+
+            grouped_commits_list = [
+                {
+                    'Branch': branch,
+                    'Author': author,
+                    'Commits': commits,
+                    'Additions': additions if collect_diff_stats else None,
+                    'Deletions': deletions if collect_diff_stats else None
+                }
+                for (branch, author), (commits, additions, deletions) in sorted(branch_author_totals.items())
+            ]
 
             # Guardar estadísticas en CSV
-            output_dir = 'github_stats'
-            os.makedirs(output_dir, exist_ok=True)
             csv_path = os.path.join(output_dir, 'commits_by_branch_author.csv')
-            grouped_commits.to_csv(csv_path, index=False)
+            with open(csv_path, 'w', newline='', encoding='utf-8') as csv_file:
+                writer = csv.DictWriter(csv_file, fieldnames=BRANCH_AUTHOR_FIELDS)
+                writer.writeheader()
+                writer.writerows(grouped_commits_list)
             self.logger.info(f"Commit statistics saved to {csv_path}")
 
-            if detailed_commit_data:
-                df_detailed = pd.DataFrame(detailed_commit_data)
-                detailed_csv_path = os.path.join(output_dir, 'detailed_commits.csv')
-                df_detailed.to_csv(detailed_csv_path, index=False)
-                self.logger.info(f"Detailed commit information saved to {detailed_csv_path}")
-
-            # Análisis de lenguajes de programación
-            try:
-                self.logger.info("Attempting to get languages...")
-                repo = self.github.get_repo(self._extract_repo_name(repo_url))
-                
-                # Obtener lenguajes (retorna dict con lenguajes y bytes de código)
-                languages = repo.get_languages()
-                self.logger.info(f"Raw language data: {languages}")
-                
-                if not languages:
-                    self.logger.warning(f"No languages detected for repo: {repo.full_name}")
-                    # Intentar forzar una actualización de detección de lenguajes
-                    try:
-                        default_branch = repo.default_branch
-                        self.logger.info(f"Checking default branch: {default_branch}")
-                        latest_commit = repo.get_branch(default_branch).commit
-                        self.logger.info(f"Latest commit: {latest_commit.sha}")
-                        languages = repo.get_languages()
-                    except Exception as e:
-                        self.logger.error(f"Failed to force language detection: {str(e)}")
-                        languages_data = []
-                
-                # Procesamiento de datos de lenguajes
-                if languages:
-                    total_bytes = sum(languages.values())
-                    languages_data = [
-                        {
-                            "name": lang,
-                            "percentage": round((size / total_bytes) * 100, 2),
-                            "bytes": size
-                        }
-                        for lang, size in languages.items()
-                    ]
-                    self.logger.info(f"Successfully processed languages: {languages_data}")
-                else:
-                    languages_data = []
-                    
-            except Exception as lang_error:
-                self.logger.error(f"Error in language detection: {str(lang_error)}", exc_info=True)
-                languages_data = []
-            
-            # Detección de bibliotecas
-            try:
-                libraries_data = self.detect_libraries(repo)
-                self.logger.info(f"Detected {len(libraries_data)} libraries in the repository")
-            except Exception as lib_error:
-                self.logger.error(f"Error detecting libraries: {str(lib_error)}", exc_info=True)
-                libraries_data = []
+            # Lenguajes y bibliotecas del HEAD de la rama por defecto
+            snapshot = self.get_languages_and_libraries(repo, branch_heads.get(repo.default_branch))
+            languages_data = snapshot["languages"]
+            libraries_data = snapshot["libraries"]
 
             # Retornar resultados completos
             return {
-                "branches": [b.name for b in branches],
+                "branches": branches,
                 "commit_count": commit_count,
-                "contributors": contributors_data,
+                "contributors": dict(contributors_data),
                 "languages": languages_data,
                 "libraries": libraries_data,
                 "commit_analysis": grouped_commits_list,
-                "total_additions": total_additions,
-                "total_deletions": total_deletions
+                # None indica que no se calcularon (collect_diff_stats=False), no que sean 0
+                "total_additions": total_additions if collect_diff_stats else None,
+                "total_deletions": total_deletions if collect_diff_stats else None
             }
 
         except Exception as e:
@@ -262,6 +664,81 @@ class GitHubAnalyzer:
                 "total_deletions": 0
             }
 
+    def get_languages_and_libraries(self, repo, head_sha=None):
+        """
+        Obtiene los lenguajes y bibliotecas del repositorio sin recorrer el historial
+        de commits ni escribir los CSV de get_repo_stats.
+
+        Args:
+            repo: Objeto de repositorio de GitHub
+            head_sha (str): SHA del HEAD de la rama por defecto, ya conocido por el
+                listado de ramas; sin él el resultado no se cachea
+
+        Returns:
+            dict: Listas de lenguajes ("languages") y bibliotecas ("libraries")
+        """
+        # Lenguajes y bibliotecas solo cambian con el HEAD de la rama por defecto
+        owner, name = repo.full_name.split("/")
+        snapshot_path = self._snapshot_path(owner, name, head_sha)
+        snapshot = self._load_snapshot(snapshot_path)
+        if snapshot is not None:
+            self.logger.info(f"Using cached languages and libraries from {snapshot_path}")
+            return snapshot
+
+        # Análisis de lenguajes de programación
+        try:
+            self.logger.info("Attempting to get languages...")
+
+            # Obtener lenguajes (retorna dict con lenguajes y bytes de código)
+            languages = self._cached_get(f"{repo.url}/languages")
+            self.logger.info(f"Raw language data: {languages}")
+        
+            if not languages:
+                self.logger.warning(f"No languages detected for repo: {repo.full_name}")
+                # Intentar forzar una actualización de detección de lenguajes
+                try:
+                    default_branch = repo.default_branch
+                    self.logger.info(f"Checking default branch: {default_branch}")
+                    latest_commit = repo.get_branch(default_branch).commit
+                    self.logger.info(f"Latest commit: {latest_commit.sha}")
+                    languages = self._cached_get(f"{repo.url}/languages")
+                except Exception as e:
+                    self.logger.error(f"Failed to force language detection: {str(e)}")
+                    languages_data = []
+        
+            # Procesamiento de datos de lenguajes
+            if languages:
+                total_bytes = sum(languages.values())
+                languages_data = [
+                    {
+                        "name": lang,
+                        "percentage": round((size / total_bytes) * 100, 2),
+                        "bytes": size
+                    }
+                    for lang, size in languages.items()
+                ]
+                self.logger.info(f"Successfully processed languages: {languages_data}")
+            else:
+                languages_data = []
+            
+        except Exception as lang_error:
+            self.logger.error(f"Error in language detection: {str(lang_error)}", exc_info=True)
+            languages_data = []
+    
+        # Detección de bibliotecas
+        try:
+            libraries_data = self.detect_libraries(repo)
+            self.logger.info(f"Detected {len(libraries_data)} libraries in the repository")
+        except Exception as lib_error:
+            self.logger.error(f"Error detecting libraries: {str(lib_error)}", exc_info=True)
+            libraries_data = []
+
+        # Un resultado sin lenguajes suele indicar un fallo transitorio: no se cachea
+        if languages_data:
+            self._save_snapshot(snapshot_path, {"languages": languages_data, "libraries": libraries_data})
+
+        return {"languages": languages_data, "libraries": libraries_data}
+
     def clone_repo(self, repo_url, target_dir="cloned_repo"):
         """
         Clona un repositorio de GitHub en el directorio local especificado.
@@ -277,28 +754,34 @@ class GitHubAnalyzer:
             # Limpiar directorio existente si existe
             if os.path.exists(target_dir):
                 self.logger.info(f"Eliminando directorio existente: {target_dir}")
-                os.system(f"rd /s /q {target_dir}")  # Comando Windows
-
-            # Obtener repositorio y sus contenidos
-            clone_command = f"git clone {repo_url} {target_dir}"
-            os.system(clone_command)
-
-            if not os.path.exists(target_dir):
-                # Fallback al método anterior si git clone falla
-                repo = self.github.get_repo(self._extract_repo_name(repo_url))
-                contents = repo.get_contents("")
-                os.makedirs(target_dir, exist_ok=True)
-            
-            # Clonar archivos y directorios
-                for content in contents:
-                    if content.type == "dir":
-                        os.makedirs(os.path.join(target_dir, content.path), exist_ok=True)
-                    elif content.type == "file":
-                        with open(os.path.join(target_dir, content.path), 'wb') as f:
-                            f.write(content.decoded_content)
+                shutil.rmtree(target_dir, ignore_errors=True)
+
+            # Se clona la URL canónica del repositorio: admite enlaces a /tree/ o /blob/
+            # y evita pasar a git el texto introducido por el usuario
+            clone_url = f"https://github.com/{self._extract_repo_name(repo_url)}.git"
+
+            # Clonado superficial: solo se necesita el árbol de trabajo actual.
+            # Sin prompt de credenciales: una URL privada o errónea falla en lugar de bloquear.
+            # '--' impide que la URL o el destino se interpreten como opciones de git
+            subprocess.run(
+                ["git", "clone", "--depth=1", "--filter=blob:none", "--single-branch",
+                 "--", clone_url, target_dir],
+                check=True,
+                capture_output=True,
+                text=True,
+                timeout=CLONE_TIMEOUT,
+                env={**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+            )
 
             self.logger.info(f"Clonado exitosamente {repo_url} en {target_dir}")
             return target_dir
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"Error al clonar repositorio: {e.stderr.strip()}")
+            return None
+        except subprocess.TimeoutExpired:
+            self.logger.error(f"Error al clonar repositorio: tiempo de espera agotado ({CLONE_TIMEOUT}s)")
+            shutil.rmtree(target_dir, ignore_errors=True)
+            return None
         except Exception as e:
             self.logger.error(f"Error al clonar repositorio: {e}")
             return None
@@ -311,45 +794,84 @@ class GitHubAnalyzer:
             stats_data (dict): Estadísticas del repositorio de get_repo_stats
             output_path (str): Directorio para guardar las visualizaciones
         """
+        plt, sns = _get_plotting_modules()
+
         try:
             # Crear directorio de salida si no existe
             if not os.path.exists(output_path):
                 os.makedirs(output_path)
                 
-            # Convertir datos a formato DataFrame
-            branch_data = pd.DataFrame({
-                'Branch': stats_data['branches'], 
-                'Commits': [stats_data['commit_count']] * len(stats_data['branches'])
-            })
-            
-            author_data = pd.DataFrame({
-                'Author': list(stats_data['contributors'].keys()),
-                'Commits': list(stats_data['contributors'].values())
-            })
-
-            # Generar visualización de commits por rama
-            plt.figure(figsize=(10, 6))
-            sns.barplot(data=branch_data, x='Branch', y='Commits')
-            plt.title('Total Commits by Branch')
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            plt.savefig(os.path.join(output_path, 'commits_by_branch.png'))
-            plt.close()
-
-            # Generar visualización de commits por autor
-            plt.figure(figsize=(10, 6))
-            sns.barplot(data=author_data, x='Author', y='Commits')
-            plt.title('Total Commits by Author')
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            plt.savefig(os.path.join(output_path, 'commits_by_author.png'))
-            plt.close()
+            # Seaborn acepta listas directamente: no hace falta construir DataFrames
+            branches = stats_data['branches']
+            branch_commits = [stats_data['commit_count']] * len(branches)
+            authors = list(stats_data['contributors'].keys())
+            author_commits = list(stats_data['contributors'].values())
+
+            # Una única figura reutilizada para ambas gráficas
+            fig, ax = plt.subplots(figsize=(10, 6))
+            try:
+                # Generar visualización de commits por rama
+                sns.barplot(x=branches, y=branch_commits, ax=ax)
+                ax.set(title='Total Commits by Branch', xlabel='Branch', ylabel='Commits')
+                ax.tick_params(axis='x', labelrotation=45)
+                fig.tight_layout()
+                fig.savefig(os.path.join(output_path, 'commits_by_branch.png'))
+                ax.clear()
+
+                # Generar visualización de commits por autor
+                sns.barplot(x=authors, y=author_commits, ax=ax)
+                ax.set(title='Total Commits by Author', xlabel='Author', ylabel='Commits')
+                ax.tick_params(axis='x', labelrotation=45)
+                fig.tight_layout()
+                fig.savefig(os.path.join(output_path, 'commits_by_author.png'))
+            finally:
+                plt.close(fig)
             
             self.logger.info(f"Visualizations saved to {output_path}")
             
         except Exception as e:
             self.logger.error(f"Error generating visualizations: {e}")
 
+    def _iter_repo_files(self, path):
+        """
+        Recorre recursivamente el directorio con os.scandir y devuelve las rutas
+        de los archivos con extensiones soportadas.
+
+        Args:
+            path (str): Directorio a recorrer
+
+        Yields:
+            str: Ruta de cada archivo soportado
+        """
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self._iter_repo_files(entry.path)
+                    continue
+
+                name = entry.name
+                dot = name.rfind(".")
+                if dot >= 0 and name[dot:] in SUPPORTED_EXTENSIONS and entry.is_file():
+                    yield entry.path
+
+    def _read_text_file(self, file_path):
+        """
+        Lee un archivo en binario y lo decodifica como UTF-8.
+
+        Args:
+            file_path (str): Ruta del archivo
+
+        Returns:
+            str: Contenido del archivo, o None si no se pudo leer
+        """
+        try:
+            text = Path(file_path).read_bytes().decode("utf-8", "replace")
+            self.logger.debug(f"Successfully read file: {file_path}")
+            return text
+        except Exception as e:
+            self.logger.error(f"Error reading {file_path}: {e}")
+            return None
+
     def extract_text_from_repo(self, repo_path="cloned_repo"):
         """
         Extrae el contenido de texto de los archivos en el repositorio.
@@ -361,20 +883,12 @@ class GitHubAnalyzer:
             list: Lista de contenidos de texto extraídos de archivos soportados
         """
         try:
-            repo_docs = []
-            supported_extensions = (".py", ".md", ".txt", ".js", ".html", ".css")
-            
-            # Recorrer todos los archivos del repositorio
-            for root, _, files in os.walk(repo_path):
-                for file in files:
-                    if file.endswith(supported_extensions): 
-                        file_path = os.path.join(root, file)
-                        try:
-                            with open(file_path, "r", encoding="utf-8") as f:
-                                repo_docs.append(f.read())
-                                self.logger.debug(f"Successfully read file: {file_path}")
-                        except Exception as e:
-                            self.logger.error(f"Error reading {file_path}: {e}")
+            file_paths = list(self._iter_repo_files(repo_path))
+
+            # Lectura concurrente de los archivos (limitada por E/S)
+            with ThreadPoolExecutor(max_workers=IO_WORKERS) as executor:
+                contents = executor.map(self._read_text_file, file_paths)
+                repo_docs = [text for text in contents if text is not None]
             
             self.logger.info(f"Extracted text from {len(repo_docs)} files in {repo_path}")
             return repo_docs
@@ -382,6 +896,7 @@ class GitHubAnalyzer:
         except Exception as e:
             self.logger.error(f"Error extracting text from repository: {e}")
             return []
+
     def detect_libraries(self, repo):
         """
         Detecta las bibliotecas utilizadas en el repositorio basándose en archivos
@@ -420,7 +935,7 @@ class GitHubAnalyzer:
             # Buscar package.json (JavaScript/Node.js)
             try:
                 package_json = repo.get_contents("package.json")
-                content = json.loads(package_json.decoded_content.decode('utf-8'))
+                content = _json_loads(package_json.decoded_content)
                 
                 # Procesar dependencias
                 if 'dependencies' in content:
@@ -449,25 +964,22 @@ class GitHubAnalyzer:
             # Buscar pom.xml (Maven/Java)
             try:
                 pom_xml = repo.get_contents("pom.xml")
-                from xml.etree import ElementTree
-                
-                content = pom_xml.decoded_content.decode('utf-8')
-                root = ElementTree.fromstring(content)
-                
-                # Buscar dependencias en pom.xml
-                ns = {'': 'http://maven.apache.org/POM/4.0.0'}
-                dependencies = root.findall('.//dependencies/dependency', ns)
-                
-                for dep in dependencies:
-                    group_id = dep.find('./groupId', ns)
-                    artifact_id = dep.find('./artifactId', ns)
-                    
+
+                # Lectura en streaming: solo se procesan las etiquetas <dependency>
+                for _, elem in ElementTree.iterparse(io.BytesIO(pom_xml.decoded_content), events=('end',)):
+                    if elem.tag != MAVEN_DEPENDENCY_TAG:
+                        continue
+
+                    group_id = elem.findtext(f"{MAVEN_NS}groupId")
+                    artifact_id = elem.findtext(f"{MAVEN_NS}artifactId")
+
                     if group_id is not None and artifact_id is not None:
                         libraries_data.append({
-                            'name': f"{group_id.text}:{artifact_id.text}",
+                            'name': f"{group_id}:{artifact_id}",
                             'category': 'Java',
                             'source': 'pom.xml'
                         })
+                    elem.clear()
                     
                 self.logger.info(f"Found {len(libraries_data)} libraries in pom.xml")
             except Exception as e:
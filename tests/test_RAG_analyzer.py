@@ -1,22 +1,53 @@
 import pytest
-from unittest.mock import MagicMock, patch, ANY
+import logging
+from contextlib import ExitStack
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch, ANY, create_autospec
 import os
 import json
 from datetime import datetime
 import requests
-from requests import HTTPError as http_error
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from RAG_analyzer import LLMClient, GitHubRAGAnalyzer
 from briefing_analyzer import ComplianceAnalyzer
+from github_getter import GitHubAnalyzer
+from RAG_process import RepoRAGProcessor
+
+@pytest.fixture(scope="module")
+def mock_logger():
+    # One spec'd logger per module, reset before each test
+    return create_autospec(logging.Logger, instance=True)
+
+@pytest.fixture(autouse=True)
+def reset_logger(mock_logger):
+    mock_logger.reset_mock()
+
+# LLM analysis with all five report sections
+_LLM_SUCCESS_RESPONSE = (
+    "# 1. Análisis Técnico Multinivel\nContent here\n"
+    "## 2. Niveles de Objetivos Alcanzados\nMore content\n"
+    "### 3. Uso de IA y Señales de Alerta Pedagógica\nEven more content\n"
+    "#### 4. Mejoras Priorizadas para Madurez Técnica\nAdditional content\n"
+    "##### 5. Elementos para Revisión Docente\nFinal content"
+)
+
+# LLM analysis missing sections 3, 4 and 5
+_LLM_MISSING_SECTIONS_RESPONSE = (
+    "# 1. Análisis Técnico Multinivel\n"
+    "Content here\n"
+    "## 2. Niveles de Objetivos Alcanzados\n"
+    "More content\n"
+)
+
+# Rate-limit error from the Groq API, which triggers the Ollama fallback
+_HTTP_429_ERROR = requests.exceptions.HTTPError("API error")
+_HTTP_429_ERROR.response = SimpleNamespace(status_code=429)
+
+def _mk_attr_response(content):
+    """LLM response object exposing its text through a content attribute"""
+    return MagicMock(content=content)
 
 class TestLLMClient:
     
-    @pytest.fixture
-    def mock_logger(self):
-        return MagicMock()
-    
     @patch('RAG_analyzer.ChatGroq')
     def test_init_with_groq_api_key(self, mock_chat_groq, mock_logger):
         # Test successful initialization with Groq API key
@@ -83,47 +114,24 @@ class TestLLMClient:
         assert result is False
         mock_logger.error.assert_called_once()
     
-    def test_invoke_ollama_response(self, mock_logger):
-        # Create client with mocked LLM
-        client = LLMClient(groq_api_key=None, logger=mock_logger)
-        client.using_ollama = True
-        client.llm = MagicMock()
-        client.llm.invoke.return_value = "Ollama response"
-        
-        # Call invoke
-        response = client.invoke([{"role": "user", "content": "test"}])
-        
-        # Verify
-        assert response == "Ollama response"
-    
-    def test_invoke_groq_response_attribute(self, mock_logger):
-        # Create client with mocked LLM returning object with content attribute
+    @pytest.mark.parametrize("using_ollama,llm_response,expected", [
+        (True, "Ollama response", "Ollama response"),
+        (False, _mk_attr_response("Groq response"), "Groq response"),
+        (False, {"content": "Groq dict response"}, "Groq dict response"),
+    ])
+    def test_invoke_response_formats(self, mock_logger, using_ollama, llm_response, expected):
+        # Create client with mocked LLM returning a plain string, an object
+        # with a content attribute or a dict with a content key
         client = LLMClient(groq_api_key="test_key", logger=mock_logger)
-        client.using_ollama = False
+        client.using_ollama = using_ollama
         client.llm = MagicMock()
-        
-        mock_response = MagicMock()
-        mock_response.content = "Groq response"
-        client.llm.invoke.return_value = mock_response
+        client.llm.invoke.return_value = llm_response
         
         # Call invoke
         response = client.invoke([{"role": "user", "content": "test"}])
         
         # Verify
-        assert response == "Groq response"
-    
-    def test_invoke_groq_response_dict(self, mock_logger):
-        # Create client with mocked LLM returning dict with content key
-        client = LLMClient(groq_api_key="test_key", logger=mock_logger)
-        client.using_ollama = False
-        client.llm = MagicMock()
-        client.llm.invoke.return_value = {"content": "Groq dict response"}
-        
-        # Call invoke
-        response = client.invoke([{"role": "user", "content": "test"}])
-        
-        # Verify
-        assert response == "Groq dict response"
+        assert response == expected
     
     def test_invoke_http_error_fallback(self, mock_logger):
         # Create client
@@ -132,14 +140,7 @@ class TestLLMClient:
         # Setup primary LLM to raise an HTTP error
         client.llm = MagicMock()
         
-        http_error = requests.exceptions.HTTPError("API error")
-        http_error.response = MagicMock()
-        http_error.response.status_code = 429
-
-        def raise_http_error(*args, **kwargs):
-            raise http_error
-        
-        client.llm.invoke.side_effect = raise_http_error
+        client.llm.invoke.side_effect = _HTTP_429_ERROR
 
         # Mock the fallback behavior
         client.using_ollama = False
@@ -161,138 +162,111 @@ class TestLLMClient:
         client._switch_to_ollama.assert_called_once()
 
 
+def _setup_clone_error(analyzer):
+    # Repository cloning fails
+    analyzer.github_analyzer.clone_repo.return_value = None
+
+def _setup_repo_processing_error(analyzer):
+    # Repository cloning succeeds but processing fails
+    analyzer.github_analyzer.clone_repo.return_value = "/path/to/cloned/repo"
+    analyzer.rag_processor.process_repository.return_value = False
+
+def _setup_repo_ready(analyzer):
+    # Repository cloning and processing succeed
+    analyzer.github_analyzer.clone_repo.return_value = "/path/to/cloned/repo"
+    analyzer.rag_processor.process_repository.return_value = True
+
+def _setup_briefing_processing_error(analyzer):
+    _setup_repo_ready(analyzer)
+    analyzer.rag_processor.process_briefing.return_value = False
+
+def _setup_analysis_ready(analyzer):
+    # Briefing, repository stats, technologies and RAG contexts are all available
+    _setup_repo_ready(analyzer)
+    analyzer.rag_processor.process_briefing.return_value = True
+    analyzer.github_analyzer.get_repo_stats.return_value = {"stars": 10, "forks": 5}
+    analyzer.rag_processor.technologies = {"python": 80, "javascript": 20}
+    analyzer.rag_processor.get_formatted_contexts.return_value = ["Formatted context"] * 6
+
+def _setup_llm_error(analyzer):
+    _setup_analysis_ready(analyzer)
+    analyzer.llm_client.invoke.side_effect = Exception("LLM error")
+
 class TestGitHubRAGAnalyzer:
     
-    @pytest.fixture
-    def mock_logger(self):
-        return MagicMock()
+    @pytest.fixture(scope="module")
+    def patched_components(self):
+        # Patch the analyzer's collaborators once for the whole module
+        with ExitStack() as stack:
+            yield SimpleNamespace(**{
+                name: stack.enter_context(patch(f"RAG_analyzer.{name}"))
+                for name in ("LLMClient", "GitHubAnalyzer", "ComplianceAnalyzer", "RepoRAGProcessor", "load_dotenv")
+            })
     
-    @pytest.fixture
-    def analyzer(self, mock_logger):
-        with patch('RAG_analyzer.LLMClient'), \
-             patch('RAG_analyzer.GitHubAnalyzer'), \
-             patch('RAG_analyzer.ComplianceAnalyzer'), \
-             patch('RAG_analyzer.RepoRAGProcessor'), \
-             patch('RAG_analyzer.load_dotenv'):
-            
-            # Create analyzer instance
-            analyzer = GitHubRAGAnalyzer(
-                model_name="test-model",
-                api_key="test-key",
-                ollama_model="test-ollama-model"
-            )
-            
-            # Configure mocks
-            analyzer.logger = mock_logger
-            analyzer.llm_client = MagicMock()
-            analyzer.github_analyzer = MagicMock()
-            analyzer.compliance_analyzer = MagicMock()
-            analyzer.rag_processor = MagicMock()
-            
-            return analyzer
-    
-    def test_initialization(self):
-        # Test initialization with all components properly set up
-        with patch('RAG_analyzer.LLMClient') as mock_llm, \
-             patch('RAG_analyzer.GitHubAnalyzer') as mock_github, \
-             patch('RAG_analyzer.ComplianceAnalyzer') as mock_compliance, \
-             patch('RAG_analyzer.RepoRAGProcessor') as mock_rag, \
-             patch('RAG_analyzer.load_dotenv'):
-            
-            analyzer = GitHubRAGAnalyzer(
-                model_name="test-model",
-                api_key="test-key",
-                ollama_model="test-ollama-model",
-                embedding_model="test-embedding-model"
-            )
-            
-            # Verify proper initialization
-            mock_llm.assert_called_once_with(
-                groq_api_key="test-key",
-                groq_model="test-model",
-                ollama_model="test-ollama-model",
-                logger=analyzer.logger
-            )
-            mock_github.assert_called_once()
-            mock_compliance.assert_called_once()
-            mock_rag.assert_called_once_with(embedding_model_name="test-embedding-model")
-    
-    def test_analyze_requirements_completion_success(self, analyzer):
-        # Mock repository cloning
-        analyzer.github_analyzer.clone_repo.return_value = "/path/to/cloned/repo"
-        
-        # Mock repository processing
-        analyzer.rag_processor.process_repository.return_value = True
-        
-        # Mock briefing file existence and processing
-        with patch('RAG_analyzer.os.path.exists', return_value=True):
-            analyzer.compliance_analyzer = MagicMock()
-            analyzer.rag_processor.process_briefing.return_value = True
+    @pytest.fixture(scope="module")
+    def analyzer(self, patched_components, mock_logger):
+        # Create analyzer instance
+        analyzer = GitHubRAGAnalyzer(
+            model_name="test-model",
+            api_key="test-key",
+            ollama_model="test-ollama-model"
+        )
         
-            # Mock repository stats and technologies
-            analyzer.github_analyzer.get_repo_stats.return_value = {"stars": 10, "forks": 5}
-            analyzer.rag_processor.technologies = {"python": 80, "javascript": 20}
-            
-            # Mock RAG context retrieval
-            analyzer.rag_processor.get_formatted_context.return_value = "Formatted context"
-            
-            # Mock LLM response
-            analyzer.llm_client.invoke.return_value = (
-                "# 1. Análisis Técnico Multinivel\nContent here\n"
-                "## 2. Niveles de Objetivos Alcanzados\nMore content\n"
-                "### 3. Uso de IA y Señales de Alerta Pedagógica\nEven more content\n"
-                "#### 4. Mejoras Priorizadas para Madurez Técnica\nAdditional content\n"
-                "##### 5. Elementos para Revisión Docente\nFinal content"
-            )
-            
-            # Call method
-            result = analyzer.analyze_requirements_completion(
-                repo_url="https://github.com/user/repo",
-                briefing_path="/path/to/briefing.pdf"
-            )
+        # Configure mocks
+        analyzer.logger = mock_logger
+        analyzer.llm_client = create_autospec(LLMClient, instance=True)
+        analyzer.github_analyzer = create_autospec(GitHubAnalyzer, instance=True)
+        analyzer.compliance_analyzer = create_autospec(ComplianceAnalyzer, instance=True)
+        analyzer.rag_processor = create_autospec(RepoRAGProcessor, instance=True)
         
-        # Verify successful flow
-        assert result["status"] == "success"
-        assert "evaluacion_general" in result["tier_analysis"]
+        return analyzer
     
-    def test_analyze_requirements_completion_missing_sections(self, analyzer):
-        # Mock repository cloning and processing success
-        analyzer.github_analyzer.clone_repo.return_value = "/path/to/cloned/repo"
-        analyzer.rag_processor.process_repository.return_value = True
-        
-        # Mock briefing file existence and processing - using correct import path
-        with patch('RAG_analyzer.os.path.exists', return_value=True):
-            analyzer.rag_processor.process_briefing.return_value = True
-        
-            # Mock repository stats and technologies
-            analyzer.github_analyzer.get_repo_stats.return_value = {"stars": 10, "forks": 5}
-            analyzer.rag_processor.technologies = {"python": 80, "javascript": 20}
-            
-            # Mock RAG context retrieval
-            analyzer.rag_processor.get_formatted_context.return_value = "Formatted context"
-            
-            # Mock LLM response with missing sections
-            analyzer.llm_client.invoke.return_value = (
-                "# 1. Análisis Técnico Multinivel\n"
-                "Content here\n"
-                "## 2. Niveles de Objetivos Alcanzados\n"
-                "More content\n"
-                # Missing sections 3, 4, 5
-            )
-            
-            # Call method
-            result = analyzer.analyze_requirements_completion(
-                repo_url="https://github.com/user/repo",
-                briefing_path="/path/to/briefing.pdf"
-            )
+    @pytest.fixture(autouse=True)
+    def briefing_exists(self, request, monkeypatch):
+        # The briefing file is taken to exist unless the test is marked briefing_missing
+        exists = 'briefing_missing' not in request.keywords
+        monkeypatch.setattr('RAG_analyzer.os.path.exists', lambda _: exists)
+    
+    @pytest.fixture(autouse=True)
+    def reset_analyzer(self, analyzer):
+        # The analyzer is shared by the module: clear calls and configured results between tests
+        for component in (analyzer.llm_client, analyzer.github_analyzer, analyzer.rag_processor):
+            component.reset_mock(return_value=True, side_effect=True)
+    
+    def test_initialization(self, patched_components):
+        # Test initialization with all components properly set up
+        for component in vars(patched_components).values():
+            component.reset_mock()
+        
+        analyzer = GitHubRAGAnalyzer(
+            model_name="test-model",
+            api_key="test-key",
+            ollama_model="test-ollama-model",
+            embedding_model="test-embedding-model"
+        )
         
-        # Verify successful flow and added missing sections
-        assert result["status"] == "success"
-        assert "3. Uso de IA y Señales de Alerta Pedagógica" in result["tier_analysis"]["evaluacion_general"]
+        # Verify proper initialization
+        patched_components.LLMClient.assert_called_once_with(
+            groq_api_key="test-key",
+            groq_model="test-model",
+            ollama_model="test-ollama-model",
+            logger=analyzer.logger
+        )
+        patched_components.GitHubAnalyzer.assert_called_once()
+        patched_components.ComplianceAnalyzer.assert_called_once()
+        patched_components.RepoRAGProcessor.assert_called_once_with(embedding_model_name="test-embedding-model")
     
-    def test_analyze_requirements_completion_clone_error(self, analyzer):
-        # Mock repository cloning failure
-        analyzer.github_analyzer.clone_repo.return_value = None
+    @pytest.mark.parametrize("llm_response,expected_section", [
+        (_LLM_SUCCESS_RESPONSE, "5. Elementos para Revisión Docente"),
+        # Missing sections are added to the report
+        (_LLM_MISSING_SECTIONS_RESPONSE, "3. Uso de IA y Señales de Alerta Pedagógica"),
+    ])
+    def test_analyze_requirements_completion_success(self, analyzer, llm_response, expected_section):
+        # Mock a successful pipeline up to the LLM call
+        _setup_analysis_ready(analyzer)
+        
+        # Mock LLM response
+        analyzer.llm_client.invoke.return_value = llm_response
         
         # Call method
         result = analyzer.analyze_requirements_completion(
@@ -300,15 +274,20 @@ class TestGitHubRAGAnalyzer:
             briefing_path="/path/to/briefing.pdf"
         )
         
-        # Verify error handling
-        assert result["status"] == "error"
-        assert "Failed to clone repository" in result["error"]
-        analyzer.logger.error.assert_called()
+        # Verify successful flow and report sections
+        assert result["status"] == "success"
+        assert expected_section in result["tier_analysis"]["evaluacion_general"]
     
-    def test_analyze_requirements_completion_repo_processing_error(self, analyzer):
-        # Mock repository cloning success but processing failure
-        analyzer.github_analyzer.clone_repo.return_value = "/path/to/cloned/repo"
-        analyzer.rag_processor.process_repository.return_value = False
+    @pytest.mark.parametrize("setup,expected_error", [
+        (_setup_clone_error, "Failed to clone repository"),
+        (_setup_repo_processing_error, "Failed to process repository content"),
+        pytest.param(_setup_repo_ready, "Briefing file not found", marks=pytest.mark.briefing_missing),
+        (_setup_briefing_processing_error, "Failed to process briefing document"),
+        (_setup_llm_error, "Error during LLM analysis"),
+    ])
+    def test_analyze_requirements_completion_errors(self, analyzer, setup, expected_error):
+        # Mock the failing step
+        setup(analyzer)
         
         # Call method
         result = analyzer.analyze_requirements_completion(
@@ -318,69 +297,5 @@ class TestGitHubRAGAnalyzer:
         
         # Verify error handling
         assert result["status"] == "error"
-        assert "Failed to process repository content" in result["error"]
-    
-    def test_analyze_requirements_completion_briefing_not_found(self, analyzer):
-        # Mock repository cloning and processing success
-        analyzer.github_analyzer.clone_repo.return_value = "/path/to/cloned/repo"
-        analyzer.rag_processor.process_repository.return_value = True
-        
-        # Mock briefing file not existing
-        with patch('os.path.exists', return_value=False):
-            # Call method
-            result = analyzer.analyze_requirements_completion(
-                repo_url="https://github.com/user/repo",
-                briefing_path="/path/to/briefing.pdf"
-            )
-        
-        # Verify error handling
-        assert result["status"] == "error"
-        assert "Briefing file not found" in result["error"]
-    
-    def test_analyze_requirements_completion_briefing_processing_error(self, analyzer):
-        # Mock repository cloning and processing success
-        analyzer.github_analyzer.clone_repo.return_value = "/path/to/cloned/repo"
-        analyzer.rag_processor.process_repository.return_value = True
-        
-        # Mock briefing file exists but processing fails
-        with patch('os.path.exists', return_value=True):
-            analyzer.rag_processor.process_briefing.return_value = False
-            
-            # Call method
-            result = analyzer.analyze_requirements_completion(
-                repo_url="https://github.com/user/repo",
-                briefing_path="/path/to/briefing.pdf"
-            )
-        
-        # Verify error handling
-        assert result["status"] == "error"
-        assert "Failed to process briefing document" in result["error"]
-    
-    def test_analyze_requirements_completion_llm_error(self, analyzer):
-        # Mock repository cloning and processing success
-        analyzer.github_analyzer.clone_repo.return_value = "/path/to/cloned/repo"
-        analyzer.rag_processor.process_repository.return_value = True
-        
-        # Mock briefing file exists and processes successfully
-        with patch('RAG_analyzer.os.path.exists', return_value=True):
-            analyzer.rag_processor.process_briefing.return_value = True
-        
-            # Mock repository stats and technologies
-            analyzer.github_analyzer.get_repo_stats.return_value = {"stars": 10, "forks": 5}
-            analyzer.rag_processor.technologies = {"python": 80, "javascript": 20}
-            
-            # Mock RAG context retrieval
-            analyzer.rag_processor.get_formatted_context.return_value = "Formatted context"
-            
-            # Mock LLM error
-            analyzer.llm_client.invoke.side_effect = Exception("LLM error")
-            
-            # Call method
-            result = analyzer.analyze_requirements_completion(
-                repo_url="https://github.com/user/repo",
-                briefing_path="/path/to/briefing.pdf"
-            )
-        
-        # Verify error handling
-        assert result["status"] == "error"
-        assert "Error during LLM analysis" in result["error"]
\ No newline at end of file
+        assert expected_error in result["error"]
+        analyzer.logger.error.assert_called()
\ No newline at end of file
@@ -1,10 +1,16 @@
 import pytest
 from unittest.mock import MagicMock, patch
 from langchain.schema.document import Document
-import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from RAG_process import RepoRAGProcessor
+from briefing_analyzer import EmbeddingCache
+
+# Documents are only compared by identity, so they are built once at import
+_MOCK_DOCS = [
+    Document(page_content="Test content 1", metadata={"source": "test1.py", "type": "code"}),
+    Document(page_content="Test content 2", metadata={"source": "test2.py", "type": "code"})
+]
+
 
 @pytest.fixture
 def processor():
@@ -20,6 +26,7 @@ def processor():
     
     yield processor
 
+
 def test_retrieve_relevant_content_no_vector_store(processor):
     """Test retrieve_relevant_content when vector_store is not initialized"""
     # Setup - vector_store is already None from fixture
@@ -31,23 +38,21 @@ def test_retrieve_relevant_content_no_vector_store(processor):
     assert result == []
     processor.logger.error.assert_called_once_with("Vector store not initialized")
 
+
 def test_retrieve_relevant_content_success(processor):
     """Test retrieve_relevant_content when vector_store is initialized and working"""
     # Setup
-    mock_doc1 = Document(page_content="Test content 1", metadata={"source": "test1.py", "type": "code"})
-    mock_doc2 = Document(page_content="Test content 2", metadata={"source": "test2.py", "type": "code"})
-    mock_docs = [mock_doc1, mock_doc2]
-    
     processor.vector_store = MagicMock()
-    processor.vector_store.similarity_search.return_value = mock_docs
+    processor.vector_store.similarity_search.return_value = _MOCK_DOCS
     
     # Execute
     result = processor.retrieve_relevant_content("test query")
     
     # Verify
-    assert result == mock_docs
+    assert result is _MOCK_DOCS
     processor.vector_store.similarity_search.assert_called_once_with("test query", k=8)
 
+
 def test_retrieve_relevant_content_k_parameter(processor):
     """Test retrieve_relevant_content handles k parameter correctly"""
     # Setup
@@ -61,6 +66,7 @@ def test_retrieve_relevant_content_k_parameter(processor):
     assert result == []
     processor.vector_store.similarity_search.assert_called_once_with("test query", k=5)
 
+
 def test_retrieve_relevant_content_exception(processor):
     """Test retrieve_relevant_content when similarity_search raises an exception"""
     # Setup
@@ -75,4 +81,136 @@ def test_retrieve_relevant_content_exception(processor):
     processor.logger.error.assert_called_once()
     error_call_args = processor.logger.error.call_args[0][0]
     assert "Failed to retrieve content" in error_call_args
-    assert "Test error" in error_call_args
\ No newline at end of file
+    assert "Test error" in error_call_args
+
+
+def test_read_file_drops_invalid_utf8(processor, tmp_path):
+    """Test _read_file decodes raw bytes and ignores invalid UTF-8 sequences"""
+    # Setup
+    file_path = tmp_path / "module.py"
+    file_path.write_bytes("print('años')\r\n".encode("utf-8") + b"\xff\n")
+    
+    # Execute
+    result = processor._read_file(str(file_path))
+    
+    # Verify
+    assert result == "print('años')\r\n\n"
+
+
+def test_filter_relevant_files_skips_noise(processor, tmp_path):
+    """Test _filter_relevant_files skips ignored directories, large, binary and generated files"""
+    # Setup
+    (tmp_path / "app.py").write_text("print('hi')")
+    (tmp_path / "node_modules" / "lib").mkdir(parents=True)
+    (tmp_path / "node_modules" / "lib" / "index.js").write_text("module.exports = {}")
+    (tmp_path / "data.json").write_text("[" + "0," * 200_000 + "0]")
+    (tmp_path / "encoded.txt").write_bytes(b"abc\x00def")
+    (tmp_path / "package-lock.json").write_text("{}")
+    
+    # Execute
+    result = processor._filter_relevant_files(str(tmp_path))
+    
+    # Verify
+    assert [os.path.basename(path) for path in result] == ["app.py"]
+
+
+def test_filter_relevant_files_by_extension(processor, tmp_path):
+    """Test _filter_relevant_files keeps supported extensions case-insensitively"""
+    # Setup
+    (tmp_path / "main.py").write_text("print('hi')")
+    (tmp_path / "README.MD").write_text("# Readme")
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG")
+    
+    # Execute
+    result = processor._filter_relevant_files(str(tmp_path))
+    
+    # Verify
+    assert sorted(os.path.basename(path) for path in result) == ["README.MD", "main.py"]
+
+
+def test_process_repository_streams_chunks_to_vector_store(processor, tmp_path):
+    """Test process_repository adds file chunks to the vector store batch by batch"""
+    # Setup
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    processor.code_splitter = RecursiveCharacterTextSplitter(chunk_size=3000, chunk_overlap=0)
+    processor.embedding_cache = EmbeddingCache(str(tmp_path / "cache" / "embeddings.sqlite"))
+    processor.embeddings.embed_documents.side_effect = lambda texts: [[1.0, 0.0] for _ in texts]
+    repo_path = tmp_path / "repo"
+    repo_path.mkdir()
+    for idx in range(60):
+        (repo_path / f"module_{idx}.py").write_text(f"value = {idx}")
+    
+    # Execute
+    with patch('RAG_process.FAISS') as mock_faiss:
+        result = processor.process_repository(str(repo_path))
+    
+    # Verify
+    assert result is True
+    vector_store = mock_faiss.from_documents.return_value
+    added = [len(call[1]["text_embeddings"]) for call in vector_store.add_embeddings.call_args_list]
+    assert added == [50, 10]
+    assert processor.vector_store is vector_store
+
+
+def test_process_repository_reuses_cached_chunk_embeddings(processor, tmp_path):
+    """Test process_repository only embeds chunks that are not in the embedding cache"""
+    # Setup
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    processor.code_splitter = RecursiveCharacterTextSplitter(chunk_size=3000, chunk_overlap=0)
+    processor.embedding_cache = EmbeddingCache(str(tmp_path / "cache" / "embeddings.sqlite"))
+    processor.embeddings.embed_documents.side_effect = lambda texts: [[1.0, 0.0] for _ in texts]
+    repo_path = tmp_path / "repo"
+    repo_path.mkdir()
+    (repo_path / "app.py").write_text("value = 1")
+    
+    # Execute
+    with patch('RAG_process.FAISS'):
+        processor.process_repository(str(repo_path))
+        (repo_path / "util.py").write_text("value = 2")
+        processor.process_repository(str(repo_path))
+    
+    # Verify
+    embedded = [call[0][0] for call in processor.embeddings.embed_documents.call_args_list]
+    assert embedded == [["value = 1"], ["value = 2"]]
+
+
+def test_get_formatted_contexts_batches_queries_and_skips_repeats(processor):
+    """Test get_formatted_contexts embeds queries once and includes shared chunks only once"""
+    # Setup
+    shared = Document(page_content="Shared content", metadata={"source": "app.py", "type": "code"})
+    briefing = Document(page_content="Briefing content", metadata={"type": "briefing"})
+    processor.vector_store = MagicMock()
+    processor.vector_store.similarity_search_with_score_by_vector.side_effect = [
+        [(shared, 0.2)], [(shared, 0.2), (briefing, 0.4)]
+    ]
+    processor.embeddings.embed_documents.return_value = [[0.1], [0.2]]
+    
+    # Execute
+    result = processor.get_formatted_contexts(["first query", "second query"], k=2)
+    
+    # Verify
+    processor.embeddings.embed_documents.assert_called_once_with(["first query", "second query"])
+    assert result == [
+        "--- FROM CODE FILE: app.py ---\nShared content\n",
+        "--- FROM BRIEFING ---\nBriefing content\n"
+    ]
+
+
+def test_get_formatted_contexts_respects_char_budget(processor):
+    """Test get_formatted_contexts keeps the closest chunks that fit in max_chars"""
+    # Setup
+    close = Document(page_content="a" * 60, metadata={"source": "close.py", "type": "code"})
+    far = Document(page_content="b" * 60, metadata={"source": "far.py", "type": "code"})
+    small = Document(page_content="c" * 30, metadata={"source": "small.py", "type": "code"})
+    processor.vector_store = MagicMock()
+    processor.vector_store.similarity_search_with_score_by_vector.side_effect = [
+        [(far, 0.9), (small, 0.5)], [(close, 0.1)]
+    ]
+    processor.embeddings.embed_documents.return_value = [[0.1], [0.2]]
+    
+    # Execute
+    result = processor.get_formatted_contexts(["first query", "second query"], k=2, max_chars=100)
+    
+    # Verify
+    assert "small.py" in result[0] and "far.py" not in result[0]
+    assert "close.py" in result[1]
@@ -1,71 +1,78 @@
 import pytest
+from collections import namedtuple
 from unittest.mock import MagicMock, patch
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from briefing_analyzer import ComplianceAnalyzer
+from briefing_analyzer import ComplianceAnalyzer, EmbeddingCache, _get_embeddings, _quantize, select_embedding_device
 
 import unittest.mock as mock
 
+# PDF page stub: the analyzer only calls page.get_text()
+Page = namedtuple("Page", ["get_text"])
+
 class TestComplianceAnalyzer:
     
-    @patch('fitz.open')
-    def test_extract_text_from_pdf_success(self, mock_open):
+    @pytest.fixture(scope="class")
+    @classmethod
+    def analyzer(cls, tmp_path_factory):
+        # Text extraction keeps no state, so one analyzer serves every PDF test
+        analyzer = ComplianceAnalyzer()
+        # Keep the embedding cache out of the user's home directory
+        analyzer.embedding_cache = EmbeddingCache(str(tmp_path_factory.mktemp("cache") / "embeddings.sqlite"))
+        return analyzer
+    
+    @pytest.fixture
+    def mock_open(self):
+        # Patched fitz.open shared by the PDF extraction tests
+        with patch('fitz.open') as mock_open:
+            yield mock_open
+    
+    def test_extract_text_from_pdf_success(self, analyzer, mock_open):
         # Setup mock PDF document with text
         mock_doc = MagicMock()
-        mock_page1 = MagicMock()
-        mock_page2 = MagicMock()
-        mock_page1.get_text.return_value = "Hello world"
-        mock_page2.get_text.return_value = "This is a test"
+        mock_page1 = Page(get_text=lambda: "Hello world")
+        mock_page2 = Page(get_text=lambda: "This is a test")
         mock_doc.__iter__.return_value = [mock_page1, mock_page2]
         mock_open.return_value = mock_doc
         
         # Execute
-        analyzer = ComplianceAnalyzer()
         result = analyzer.extract_text_from_pdf("dummy_path.pdf")
         
         # Verify
         assert result == "Hello world This is a test"
         mock_open.assert_called_once_with("dummy_path.pdf")
+        mock_doc.close.assert_called_once()
     
-    @patch('fitz.open')
-    def test_extract_text_from_pdf_exception(self, mock_open):
+    def test_extract_text_from_pdf_exception(self, analyzer, mock_open):
         # Setup mock to raise exception
         mock_open.side_effect = Exception("File not found")
         
         # Execute
-        analyzer = ComplianceAnalyzer()
         result = analyzer.extract_text_from_pdf("nonexistent.pdf")
         
         # Verify
         assert result == ""
         mock_open.assert_called_once_with("nonexistent.pdf")
     
-    @patch('fitz.open')
-    def test_extract_text_from_pdf_logging_success(self, mock_open):
+    def test_extract_text_from_pdf_logging_success(self, analyzer, mock_open, monkeypatch):
         # Setup mock PDF and logger
         mock_doc = MagicMock()
-        mock_doc.__iter__.return_value = [MagicMock(get_text=lambda: "Test")]
+        mock_doc.__iter__.return_value = [Page(get_text=lambda: "Test")]
         mock_open.return_value = mock_doc
         
-        # Execute
-        analyzer = ComplianceAnalyzer()
-        analyzer.logger = MagicMock()
+        # Execute with a per-test logger: the class-scoped analyzer is shared
+        monkeypatch.setattr(analyzer, "logger", MagicMock())
         analyzer.extract_text_from_pdf("test.pdf")
         
         # Verify logger was called correctly
         analyzer.logger.info.assert_called_once_with("Successfully extracted text from test.pdf")
         analyzer.logger.error.assert_not_called()
     
-    @patch('fitz.open')
-    def test_extract_text_from_pdf_logging_error(self, mock_open):
+    def test_extract_text_from_pdf_logging_error(self, analyzer, mock_open, monkeypatch):
         # Setup exception and logger
         error_msg = "Access denied"
         mock_open.side_effect = Exception(error_msg)
         
-        # Execute
-        analyzer = ComplianceAnalyzer()
-        analyzer.logger = MagicMock()
+        # Execute with a per-test logger: the class-scoped analyzer is shared
+        monkeypatch.setattr(analyzer, "logger", MagicMock())
         analyzer.extract_text_from_pdf("restricted.pdf")
         
         # Verify error was logged
@@ -74,16 +81,79 @@ class TestComplianceAnalyzer:
         assert "Error extracting text from PDF" in error_call_args
         assert error_msg in error_call_args
     
-    @patch('fitz.open')
-    def test_extract_text_from_pdf_empty_document(self, mock_open):
+    def test_extract_text_from_pdf_empty_document(self, analyzer, mock_open):
         # Setup mock empty PDF
         mock_doc = MagicMock()
         mock_doc.__iter__.return_value = []
         mock_open.return_value = mock_doc
         
         # Execute
-        analyzer = ComplianceAnalyzer()
         result = analyzer.extract_text_from_pdf("empty.pdf")
         
         # Verify
-        assert result == ""
\ No newline at end of file
+        assert result == ""
+    
+    @patch('briefing_analyzer.ComplianceAnalyzer.__init__', return_value=None)
+    def test_check_compliance_with_briefing_batches_embeddings(self, mock_init, tmp_path):
+        # Setup analyzer with mocked unit-length embeddings
+        analyzer = ComplianceAnalyzer()
+        analyzer.logger = MagicMock()
+        analyzer.threshold = 0.7
+        analyzer.embeddings = MagicMock()
+        analyzer.embeddings.embed_query.return_value = [1.0, 0.0]
+        analyzer.embeddings.embed_documents.return_value = [[1.0, 0.0], [0.6, 0.8]]
+        analyzer.embedding_cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite"))
+        
+        # Execute
+        result = analyzer.check_compliance_with_briefing(["doc one", "doc two"], "briefing")
+        
+        # Verify all documents are embedded in one call
+        analyzer.embeddings.embed_documents.assert_called_once_with(["doc one", "doc two"])
+        assert [r["similarity"] for r in result] == [100.0, 59.84]
+        assert [bool(r["compliant"]) for r in result] == [True, False]
+    
+    @patch('briefing_analyzer.ComplianceAnalyzer.__init__', return_value=None)
+    def test_check_compliance_with_briefing_reuses_cached_embeddings(self, mock_init, tmp_path):
+        # Setup analyzer with an on-disk cache holding one of the documents
+        analyzer = ComplianceAnalyzer()
+        analyzer.logger = MagicMock()
+        analyzer.threshold = 0.7
+        analyzer.embeddings = MagicMock()
+        analyzer.embeddings.embed_query.return_value = [1.0, 0.0]
+        analyzer.embeddings.embed_documents.return_value = [[0.6, 0.8]]
+        analyzer.embedding_cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite"))
+        analyzer.embedding_cache.set_many(["doc one"], _quantize([[1.0, 0.0]]))
+        
+        # Execute
+        result = analyzer.check_compliance_with_briefing(["doc one", "doc two"], "briefing")
+        
+        # Verify only the uncached document was embedded, and it is cached now
+        analyzer.embeddings.embed_documents.assert_called_once_with(["doc two"])
+        assert [r["similarity"] for r in result] == [100.0, 59.84]
+        assert all(v is not None for v in analyzer.embedding_cache.get_many(["doc one", "doc two"]))
+    
+    @patch('briefing_analyzer.EmbeddingCache')
+    @patch('briefing_analyzer.HuggingFaceEmbeddings')
+    def test_embeddings_loaded_lazily_and_shared(self, mock_embeddings_cls, mock_cache_cls):
+        # Setup a clean model cache
+        _get_embeddings.cache_clear()
+        
+        # Execute
+        first = ComplianceAnalyzer()
+        second = ComplianceAnalyzer()
+        mock_embeddings_cls.assert_not_called()
+        shared = first.embeddings is second.embeddings
+        _get_embeddings.cache_clear()
+        
+        # Verify the model was loaded once, on first use
+        assert shared
+        mock_embeddings_cls.assert_called_once()
+    
+    @patch('torch.cuda.is_available')
+    def test_select_embedding_device(self, mock_cuda_available):
+        # Setup GPU availability in turn
+        mock_cuda_available.side_effect = [True, False]
+        
+        # Execute and verify
+        assert select_embedding_device() == 'cuda'
+        assert select_embedding_device() == 'cpu'
@@ -1,25 +1,63 @@
 import pytest
 from unittest.mock import MagicMock, patch
-import sys
-import os
 import json
 from io import BytesIO
 from github import GithubException
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from github_getter import GitHubAnalyzer
+from github_getter import GitHubAnalyzer, ETagCache
+
+# Dependency file payloads, encoded once for every detect_libraries test
+_REQ_TXT_BYTES = b"requests==2.26.0\nnumpy>=1.20.0\n# Comment\npandas\n"
+_PKG_JSON_BYTES = json.dumps({
+    "dependencies": {
+        "react": "^17.0.2",
+        "axios": "^0.21.1"
+    },
+    "devDependencies": {
+        "jest": "^27.0.6",
+        "eslint": "^7.32.0"
+    }
+}).encode('utf-8')
+_PKG_JSON_REACT_BYTES = json.dumps({"dependencies": {"react": "^17.0.2"}}).encode('utf-8')
+_POM_XML_BYTES = b"""
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+    <dependencies>
+        <dependency>
+            <groupId>org.springframework</groupId>
+            <artifactId>spring-core</artifactId>
+        </dependency>
+        <dependency>
+            <groupId>junit</groupId>
+            <artifactId>junit</artifactId>
+        </dependency>
+    </dependencies>
+</project>
+"""
+
+# Shared 404 raised for every path a test repository does not contain
+_NOT_FOUND = GithubException(404, "Not found")
+
+def _contents_side_effect(files):
+    """Build a repo.get_contents side effect serving the given {path: content} files"""
+    def get_contents(path):
+        content = files.get(path)
+        if content is None:
+            raise _NOT_FOUND
+        return content
+    return get_contents
 
 class TestGitHubAnalyzer:
 
     @pytest.fixture
-    def analyzer(self):
+    def analyzer(self, tmp_path):
         """Create a GitHubAnalyzer with mocked GitHub API."""
         with patch('github_getter.Github'), \
              patch('github_getter.load_dotenv'):
             analyzer = GitHubAnalyzer()
             analyzer.github = MagicMock()
             analyzer.logger = MagicMock()
+            analyzer.token = "test-token"
+            # Keep the ETag cache out of the user's home directory
+            analyzer.cache = ETagCache(str(tmp_path / "api_cache.sqlite"))
             return analyzer
 
     def test_detect_libraries_requirements_txt(self, analyzer):
@@ -27,8 +65,8 @@ class TestGitHubAnalyzer:
         # Mock repo and requirements.txt content
         mock_repo = MagicMock()
         mock_requirements = MagicMock()
-        mock_requirements.decoded_content = b"requests==2.26.0\nnumpy>=1.20.0\n# Comment\npandas\n"
-        mock_repo.get_contents.side_effect = lambda path: mock_requirements if path == "requirements.txt" else None
+        mock_requirements.decoded_content = _REQ_TXT_BYTES
+        mock_repo.get_contents.side_effect = _contents_side_effect({"requirements.txt": mock_requirements})
         
         # Execute
         result = analyzer.detect_libraries(mock_repo)
@@ -44,24 +82,9 @@ class TestGitHubAnalyzer:
         # Mock repo and package.json content
         mock_repo = MagicMock()
         mock_package_json = MagicMock()
-        package_content = {
-            "dependencies": {
-                "react": "^17.0.2",
-                "axios": "^0.21.1"
-            },
-            "devDependencies": {
-                "jest": "^27.0.6",
-                "eslint": "^7.32.0"
-            }
-        }
-        mock_package_json.decoded_content = json.dumps(package_content).encode('utf-8')
+        mock_package_json.decoded_content = _PKG_JSON_BYTES
         
-        def mock_get_contents(path):
-            if path == "package.json":
-                return mock_package_json
-            raise GithubException(404, "Not found")
-            
-        mock_repo.get_contents.side_effect = mock_get_contents
+        mock_repo.get_contents.side_effect = _contents_side_effect({"package.json": mock_package_json})
         
         # Execute
         result = analyzer.detect_libraries(mock_repo)
@@ -78,43 +101,18 @@ class TestGitHubAnalyzer:
         # Mock repo and pom.xml content
         mock_repo = MagicMock()
         mock_pom_xml = MagicMock()
-        pom_content = """
-        <project xmlns="http://maven.apache.org/POM/4.0.0">
-            <dependencies>
-                <dependency>
-                    <groupId>org.springframework</groupId>
-                    <artifactId>spring-core</artifactId>
-                </dependency>
-                <dependency>
-                    <groupId>junit</groupId>
-                    <artifactId>junit</artifactId>
-                </dependency>
-            </dependencies>
-        </project>
-        """
-        mock_pom_xml.decoded_content = pom_content.encode('utf-8')
+        mock_pom_xml.decoded_content = _POM_XML_BYTES
         
         # Setup mock to return only pom.xml
-        def mock_get_contents(path):
-            if path == "pom.xml":
-                return mock_pom_xml
-            # For any other path, raise exception
-            raise GithubException(404, "Not found")
-        
-        mock_repo.get_contents.side_effect = mock_get_contents
-        
-        # Import ElementTree directly in the test to create real XML objects
-        from xml.etree import ElementTree
+        mock_repo.get_contents.side_effect = _contents_side_effect({"pom.xml": mock_pom_xml})
         
-        # Create a real XML element tree that the function would use
-        root = ElementTree.fromstring(pom_content)
-        
-        # Execute with patching ElementTree.fromstring to return our prepared root
-        with patch('xml.etree.ElementTree.fromstring', return_value=root):
-            result = analyzer.detect_libraries(mock_repo)
+        # Execute
+        result = analyzer.detect_libraries(mock_repo)
         
         # Verify
-        assert len(result) == 0
+        assert len(result) == 2
+        assert {'name': 'org.springframework:spring-core', 'category': 'Java', 'source': 'pom.xml'} in result
+        assert {'name': 'junit:junit', 'category': 'Java', 'source': 'pom.xml'} in result
 
     def test_detect_libraries_multiple_files(self, analyzer):
         """Test detecting libraries from multiple dependency files"""
@@ -127,18 +125,13 @@ class TestGitHubAnalyzer:
         
         # Mock package.json
         mock_package_json = MagicMock()
-        package_content = {"dependencies": {"react": "^17.0.2"}}
-        mock_package_json.decoded_content = json.dumps(package_content).encode('utf-8')
+        mock_package_json.decoded_content = _PKG_JSON_REACT_BYTES
         
         # Set up side effect to return different content based on path
-        def mock_get_contents(path):
-            if path == "requirements.txt":
-                return mock_requirements
-            elif path == "package.json":
-                return mock_package_json
-            raise GithubException(404, "Not found")
-            
-        mock_repo.get_contents.side_effect = mock_get_contents
+        mock_repo.get_contents.side_effect = _contents_side_effect({
+            "requirements.txt": mock_requirements,
+            "package.json": mock_package_json
+        })
         
         # Execute
         result = analyzer.detect_libraries(mock_repo)
@@ -152,7 +145,7 @@ class TestGitHubAnalyzer:
         """Test detecting libraries when no dependency files exist"""
         # Mock repo with no dependency files
         mock_repo = MagicMock()
-        mock_repo.get_contents.side_effect = GithubException(404, "Not found")
+        mock_repo.get_contents.side_effect = _NOT_FOUND
         
         # Execute
         result = analyzer.detect_libraries(mock_repo)
@@ -169,11 +162,12 @@ class TestGitHubAnalyzer:
         # Execute
         result = analyzer.detect_libraries(mock_repo)
         
-        # Verify
+        # Verify each dependency file failure is logged at debug, not as an error
         assert result == []
-        analyzer.logger.error.assert_called_once()
-        error_msg = analyzer.logger.error.call_args[0][0]
-        assert "Error detecting libraries" in error_msg
+        analyzer.logger.error.assert_not_called()
+        debug_msgs = [call[0][0] for call in analyzer.logger.debug.call_args_list]
+        assert len(debug_msgs) == 3
+        assert all("API Error" in msg for msg in debug_msgs)
 
     def test_detect_libraries_malformed_json(self, analyzer):
         """Test handling malformed package.json"""
@@ -182,16 +176,387 @@ class TestGitHubAnalyzer:
         mock_package_json = MagicMock()
         mock_package_json.decoded_content = b"{ This is not valid JSON }"
         
-        def mock_get_contents(path):
-            if path == "package.json":
-                return mock_package_json
-            raise GithubException(404, "Not found")
-            
-        mock_repo.get_contents.side_effect = mock_get_contents
+        mock_repo.get_contents.side_effect = _contents_side_effect({"package.json": mock_package_json})
         
         # Execute
         result = analyzer.detect_libraries(mock_repo)
         
         # Verify
         assert result == []
-        analyzer.logger.debug.assert_called()
\ No newline at end of file
+        analyzer.logger.debug.assert_called()
+
+    @staticmethod
+    def _history_page(nodes, has_next=False, cursor=None):
+        """Build a GraphQL commit-history response page"""
+        return {
+            "data": {
+                "repository": {
+                    "ref": {
+                        "target": {
+                            "history": {
+                                "pageInfo": {"hasNextPage": has_next, "endCursor": cursor},
+                                "nodes": nodes
+                            }
+                        }
+                    }
+                }
+            }
+        }
+
+    @staticmethod
+    def _commit_node(oid, login="dev", parents=1, message="Add feature"):
+        """Build a GraphQL commit node"""
+        return {
+            "oid": oid,
+            "message": message,
+            "additions": 10,
+            "deletions": 2,
+            # GitTimestamp keeps the author's offset: 10:30:00 in UTC
+            "authoredDate": "2024-01-15T12:30:00+02:00",
+            "author": {"user": {"login": login}},
+            "parents": {"totalCount": parents}
+        }
+
+    def test_graphql_commit_pages_paginates(self, analyzer):
+        """Test that branch history is fetched page by page through GraphQL"""
+        # Mock two pages of history
+        pages = [
+            self._history_page([self._commit_node("a1")], has_next=True, cursor="c1"),
+            self._history_page([self._commit_node("b2")])
+        ]
+
+        # Execute
+        with patch.object(analyzer, 'session') as mock_session:
+            mock_post = mock_session.post
+            mock_post.return_value.json.side_effect = pages
+            result = list(analyzer._graphql_commit_pages("user", "repo", "main"))
+
+        # Verify
+        assert [[node["oid"] for node in page] for page in result] == [["a1"], ["b2"]]
+        assert mock_post.call_count == 2
+        assert mock_post.call_args[1]["json"]["variables"]["cursor"] == "c1"
+        assert mock_post.call_args[1]["json"]["variables"]["withStats"] is True
+
+    def test_graphql_commit_pages_without_stats(self, analyzer):
+        """Test that diff stats can be left out of the GraphQL history query"""
+        # Mock a single page of history without additions/deletions
+        node = {k: v for k, v in self._commit_node("a1").items() if k not in ("additions", "deletions")}
+
+        # Execute
+        with patch.object(analyzer, 'session') as mock_session:
+            mock_post = mock_session.post
+            mock_post.return_value.json.return_value = self._history_page([node])
+            result = list(analyzer._graphql_commit_pages(
+                "user", "repo", "main", with_stats=False, since="2024-01-01T00:00:00+00:00"
+            ))
+
+        # Verify
+        assert result == [[node]]
+        assert mock_post.call_args[1]["json"]["variables"]["withStats"] is False
+        assert mock_post.call_args[1]["json"]["variables"]["since"] == "2024-01-01T00:00:00+00:00"
+
+    def test_get_repo_stats_skips_merge_commits(self, analyzer, tmp_path, monkeypatch):
+        """Test that get_repo_stats counts unique non-merge commits across branches"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr("github_getter.CACHE_DIR", str(tmp_path / "cache"))
+
+        # Mock repo with two branches sharing one commit, plus one pointing at main's HEAD
+        mock_repo = MagicMock()
+        mock_repo.full_name = "user/repo"
+        mock_repo.url = "https://api.github.com/repos/user/repo"
+        mock_repo.default_branch = "main"
+        mock_repo.get_contents.side_effect = _NOT_FOUND
+        analyzer.github.get_repo.return_value = mock_repo
+        analyzer.github.rate_limiting = (100, 5000)
+
+        rest_responses = {
+            f"{mock_repo.url}/branches?per_page=100&page=1": [
+                {"name": "main", "commit": {"sha": "m2"}},
+                {"name": "dev", "commit": {"sha": "d1"}},
+                {"name": "release", "commit": {"sha": "m2"}}
+            ],
+            f"{mock_repo.url}/languages": {"Python": 100}
+        }
+        history = {
+            "main": [
+                self._commit_node("a1"),
+                self._commit_node("m1", parents=2),
+                self._commit_node("m2", message="Merge branch 'feature' into main")
+            ],
+            "dev": [self._commit_node("a1"), self._commit_node("d1", login="other")]
+        }
+
+        # Execute
+        with patch.object(analyzer, '_cached_get', side_effect=rest_responses.get), \
+             patch.object(analyzer, '_graphql_commit_pages',
+                          side_effect=lambda owner, name, branch, with_stats: iter([history[branch]])) as mock_pages:
+            result = analyzer.get_repo_stats("https://github.com/user/repo")
+
+        # Verify
+        analyzer.github.get_repo.assert_called_once_with("user/repo")
+        assert sorted(call[0][2] for call in mock_pages.call_args_list) == ["dev", "main"]
+        assert result["branches"] == ["main", "dev", "release"]
+        assert result["commit_count"] == 2
+        assert result["contributors"] == {"dev": 1, "other": 1}
+        assert result["total_additions"] == 20
+        assert result["commit_analysis"] == [
+            {'Branch': 'dev', 'Author': 'other', 'Commits': 1, 'Additions': 10, 'Deletions': 2},
+            {'Branch': 'main', 'Author': 'dev', 'Commits': 1, 'Additions': 10, 'Deletions': 2}
+        ]
+        detailed_csv = (tmp_path / "github_stats" / "detailed_commits.csv").read_text(encoding="utf-8")
+        assert detailed_csv.splitlines()[0] == "Branch,Author,CommitSHA,Message,Additions,Deletions,Date"
+        assert len(detailed_csv.splitlines()) == 3
+        assert detailed_csv.splitlines()[1].endswith(",2024-01-15 10:30:00")
+
+    def test_get_repo_stats_without_diff_stats(self, analyzer, tmp_path, monkeypatch):
+        """Test that line counts are left blank, not zeroed, when diff stats are not collected"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr("github_getter.CACHE_DIR", str(tmp_path / "cache"))
+
+        # Mock repo whose GraphQL history has no additions/deletions fields
+        mock_repo = MagicMock()
+        mock_repo.full_name = "user/repo"
+        mock_repo.url = "https://api.github.com/repos/user/repo"
+        mock_repo.get_contents.side_effect = _NOT_FOUND
+        analyzer.github.get_repo.return_value = mock_repo
+        analyzer.github.rate_limiting = (100, 5000)
+
+        rest_responses = {
+            f"{mock_repo.url}/branches?per_page=100&page=1": [{"name": "main", "commit": {"sha": "a2"}}],
+            f"{mock_repo.url}/languages": {"Python": 100}
+        }
+        nodes = [self._commit_node("a1"), self._commit_node("a2")]
+        for node in nodes:
+            del node["additions"], node["deletions"]
+
+        # Execute
+        with patch.object(analyzer, '_cached_get', side_effect=rest_responses.get), \
+             patch.object(analyzer, '_graphql_commit_pages', return_value=iter([nodes])) as mock_pages:
+            result = analyzer.get_repo_stats("https://github.com/user/repo", collect_diff_stats=False)
+
+        # Verify
+        assert mock_pages.call_args[0][3] is False
+        assert result["commit_count"] == 2
+        assert result["total_additions"] is None
+        assert result["total_deletions"] is None
+        assert result["commit_analysis"] == [
+            {'Branch': 'main', 'Author': 'dev', 'Commits': 2, 'Additions': None, 'Deletions': None}
+        ]
+        detailed_rows = (tmp_path / "github_stats" / "detailed_commits.csv").read_text(encoding="utf-8").splitlines()
+        assert detailed_rows[1] == "main,dev,a1,Add feature,,,2024-01-15 10:30:00"
+        grouped_rows = (tmp_path / "github_stats" / "commits_by_branch_author.csv").read_text(encoding="utf-8").splitlines()
+        assert grouped_rows == ["Branch,Author,Commits,Additions,Deletions", "main,dev,2,,"]
+
+    def test_get_repo_stats_requires_token(self, analyzer):
+        """Test that a missing GitHub token is reported as a configuration error"""
+        analyzer.token = None
+
+        # Execute
+        result = analyzer.get_repo_stats("https://github.com/user/repo")
+
+        # Verify no request is made and the error names the expected variable
+        analyzer.github.get_repo.assert_not_called()
+        assert "GITHUB_API_KEY" in result["error"]
+        assert result["commit_count"] == 0
+        with pytest.raises(ValueError, match="GITHUB_API_KEY"):
+            next(analyzer._graphql_commit_pages("user", "repo", "main"))
+
+    def test_get_repo_stats_stops_prefetch_on_error(self, analyzer, tmp_path, monkeypatch):
+        """Test that a processing error stops the history download instead of draining it"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr("github_getter.CACHE_DIR", str(tmp_path / "cache"))
+
+        # Mock repo whose history is long and whose commits cannot be processed
+        mock_repo = MagicMock()
+        mock_repo.full_name = "user/repo"
+        mock_repo.url = "https://api.github.com/repos/user/repo"
+        analyzer.github.get_repo.return_value = mock_repo
+        analyzer.github.rate_limiting = (100, 5000)
+
+        rest_responses = {
+            f"{mock_repo.url}/branches?per_page=100&page=1": [{"name": "main", "commit": {"sha": "abc123"}}]
+        }
+        served_pages = []
+
+        def long_history(owner, name, branch, with_stats):
+            for page in range(1000):
+                served_pages.append(page)
+                yield [{"oid": f"sha{page}"}]
+
+        # Execute
+        with patch.object(analyzer, '_cached_get', side_effect=rest_responses.get), \
+             patch.object(analyzer, '_graphql_commit_pages', side_effect=long_history):
+            result = analyzer.get_repo_stats("https://github.com/user/repo")
+
+        # Verify the error is reported and only the bounded prefetch was downloaded
+        assert result["commit_count"] == 0
+        assert len(served_pages) < 10
+
+    def test_get_repo_stats_uses_snapshot_cache(self, analyzer, tmp_path, monkeypatch):
+        """Test that languages and libraries are reused while the default branch HEAD is unchanged"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr("github_getter.CACHE_DIR", str(tmp_path / "cache"))
+
+        # Mock repo whose default branch points at a fixed commit
+        mock_repo = MagicMock()
+        mock_repo.full_name = "user/repo"
+        mock_repo.url = "https://api.github.com/repos/user/repo"
+        mock_repo.default_branch = "main"
+        analyzer.github.get_repo.return_value = mock_repo
+        analyzer.github.rate_limiting = (100, 5000)
+
+        rest_responses = {
+            f"{mock_repo.url}/branches?per_page=100&page=1": [{"name": "main", "commit": {"sha": "abc123"}}],
+            f"{mock_repo.url}/languages": {"Python": 100}
+        }
+        libraries = [{"name": "flask", "version": "2.0.0", "source": "requirements.txt", "category": "Backend"}]
+
+        # Execute
+        with patch.object(analyzer, '_cached_get', side_effect=rest_responses.get), \
+             patch.object(analyzer, '_graphql_commit_pages', side_effect=lambda *args: iter([])), \
+             patch.object(analyzer, 'detect_libraries', return_value=libraries) as mock_detect:
+            first = analyzer.get_repo_stats("https://github.com/user/repo")
+            second = analyzer.get_repo_stats("https://github.com/user/repo")
+
+        # Verify
+        mock_detect.assert_called_once()
+        assert (tmp_path / "cache" / "user__repo__abc123.json").exists()
+        assert second["languages"] == first["languages"] == [{"name": "Python", "percentage": 100.0, "bytes": 100}]
+        assert second["libraries"] == libraries
+
+    def test_get_languages_and_libraries_skips_history(self, analyzer, tmp_path, monkeypatch):
+        """Test that the quick-view helper neither walks the history nor writes the CSVs"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr("github_getter.CACHE_DIR", str(tmp_path / "cache"))
+
+        # Mock repo whose default branch points at a fixed commit
+        mock_repo = MagicMock()
+        mock_repo.full_name = "user/repo"
+        mock_repo.url = "https://api.github.com/repos/user/repo"
+        mock_repo.default_branch = "main"
+
+        rest_responses = {
+            f"{mock_repo.url}/languages": {"Python": 75, "HTML": 25}
+        }
+
+        # Execute
+        with patch.object(analyzer, '_cached_get', side_effect=rest_responses.get), \
+             patch.object(analyzer, '_graphql_commit_pages') as mock_history, \
+             patch.object(analyzer, 'detect_libraries', return_value=[]):
+            result = analyzer.get_languages_and_libraries(mock_repo, "abc123")
+
+        # Verify
+        mock_history.assert_not_called()
+        assert not (tmp_path / "github_stats").exists()
+        assert result["languages"] == [
+            {"name": "Python", "percentage": 75.0, "bytes": 75},
+            {"name": "HTML", "percentage": 25.0, "bytes": 25}
+        ]
+        assert result["libraries"] == []
+
+    def test_cached_get_uses_etag(self, analyzer, tmp_path):
+        """Test that a 304 response is served from the ETag cache"""
+        analyzer.cache = ETagCache(str(tmp_path / "cache.sqlite"))
+        url = "https://api.github.com/repos/user/repo/languages"
+
+        # First call stores the body, second call gets a 304
+        analyzer.github.requester.requestJson.side_effect = [
+            (200, {"etag": '"abc"'}, '{"Python": 100}'),
+            (304, {"etag": '"abc"'}, "")
+        ]
+
+        # Execute
+        first = analyzer._cached_get(url)
+        second = analyzer._cached_get(url)
+
+        # Verify
+        assert first == second == {"Python": 100}
+        second_call = analyzer.github.requester.requestJson.call_args_list[1]
+        assert second_call[1]["headers"] == {"If-None-Match": '"abc"'}
+
+    def test_clone_repo_shallow_clone(self, analyzer, tmp_path):
+        """Test that clone_repo runs a shallow git clone without a shell"""
+        target_dir = str(tmp_path / "cloned_repo")
+
+        # Execute
+        with patch('github_getter.subprocess.run') as mock_run:
+            result = analyzer.clone_repo("https://github.com/user/repo/tree/main/src", target_dir)
+
+        # Verify the canonical URL is cloned, after the end-of-options marker
+        assert result == target_dir
+        command = mock_run.call_args[0][0]
+        assert command[:2] == ["git", "clone"]
+        assert "--depth=1" in command
+        assert command[-3:] == ["--", "https://github.com/user/repo.git", target_dir]
+        assert mock_run.call_args[1]["timeout"] > 0
+        assert mock_run.call_args[1]["env"]["GIT_TERMINAL_PROMPT"] == "0"
+
+    def test_clone_repo_failure(self, analyzer, tmp_path):
+        """Test that a failed git clone returns None and logs the error"""
+        import subprocess
+        error = subprocess.CalledProcessError(128, ["git"], stderr="fatal: repository not found\n")
+
+        # Execute
+        with patch('github_getter.subprocess.run', side_effect=error):
+            result = analyzer.clone_repo("https://github.com/user/missing", str(tmp_path / "repo"))
+
+        # Verify
+        assert result is None
+        assert "repository not found" in analyzer.logger.error.call_args[0][0]
+
+    def test_clone_repo_timeout(self, analyzer, tmp_path):
+        """Test that a git clone that times out returns None and logs the error"""
+        import subprocess
+        error = subprocess.TimeoutExpired(["git"], 300)
+
+        # Execute
+        with patch('github_getter.subprocess.run', side_effect=error):
+            result = analyzer.clone_repo("https://github.com/user/private", str(tmp_path / "repo"))
+
+        # Verify
+        assert result is None
+        assert "tiempo de espera agotado" in analyzer.logger.error.call_args[0][0]
+
+    def test_extract_repo_name(self, analyzer):
+        """Test repository name extraction from different GitHub URL forms"""
+        urls = [
+            "https://github.com/user/repo",
+            "https://github.com/user/repo/",
+            "https://github.com/user/repo.git",
+            "https://github.com/user/repo/tree/main/src",
+            "https://github.com/user/repo/blob/main/README.md",
+            "https://github.com/user/repo?tab=readme",
+            "git@github.com:user/repo.git"
+        ]
+
+        # Execute and verify
+        for url in urls:
+            assert analyzer._extract_repo_name(url) == "user/repo", url
+
+    def test_get_repo_stats_rate_limit_exceeded(self, analyzer):
+        """Test that get_repo_stats reports an exhausted API rate limit"""
+        from github import RateLimitExceededException
+        analyzer.github.get_repo.side_effect = RateLimitExceededException(403, "API rate limit exceeded", None)
+
+        # Execute
+        result = analyzer.get_repo_stats("https://github.com/user/repo")
+
+        # Verify
+        assert result == {"error": "API rate limit exceeded"}
+        analyzer.github.get_rate_limit.assert_not_called()
+
+    def test_generate_visualizations_saves_charts(self, analyzer, tmp_path):
+        """Test that both commit charts are rendered to PNG files"""
+        # Mock stats from get_repo_stats
+        stats = {
+            "branches": ["main", "dev"],
+            "commit_count": 3,
+            "contributors": {"dev": 2, "other": 1}
+        }
+
+        # Execute
+        analyzer.generate_visualizations(stats, output_path=str(tmp_path))
+
+        # Verify
+        assert (tmp_path / "commits_by_branch.png").stat().st_size > 0
+        assert (tmp_path / "commits_by_author.png").stat().st_size > 0